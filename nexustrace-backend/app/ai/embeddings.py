@@ -1,20 +1,140 @@
-from sentence_transformers import SentenceTransformer
+import threading
+from typing import TYPE_CHECKING, Any, List, Sequence
+import numpy as np
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.metrics import QUERY_EMBEDDING_CACHE
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 embedding_model = None
+embedding_backend = None
+# Background warm-up, ingestion workers and request threads may all trigger the first load
+_load_lock = threading.Lock()
+
+# Chunk embeddings are stored as packed little-endian float32 byte arrays (4 bytes per dimension)
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+# Dynamically quantized export shipped in the sentence-transformers model repos (AVX2 runs on any recent x86 CPU)
+DEFAULT_ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+# Question embeddings keyed by (model, backend, whitespace-normalized text); shared by all request threads
+query_embedding_cache = LRUCache(settings.QUERY_EMBEDDING_CACHE_SIZE, settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS)
+
+def create_embedding_model(backend: str = None) -> "SentenceTransformer":
+    """
+    Build a SentenceTransformer for EMBEDDING_MODEL on the requested backend:
+    "torch" (PyTorch), "onnx" (ONNX Runtime, fp32) or "onnx-int8" (ONNX Runtime, int8-quantized weights).
+    The ONNX backends need `pip install "sentence-transformers[onnx]"` (optimum + onnxruntime).
+    """
+    # Imported on first use: sentence_transformers pulls in torch, which takes seconds to import
+    from sentence_transformers import SentenceTransformer
+
+    backend = (backend or settings.EMBEDDING_BACKEND).lower()
+    if backend == "torch":
+        return SentenceTransformer(settings.EMBEDDING_MODEL)
+    if backend == "onnx":
+        model_kwargs = {"file_name": settings.EMBEDDING_ONNX_FILE} if settings.EMBEDDING_ONNX_FILE else None
+        return SentenceTransformer(settings.EMBEDDING_MODEL, backend="onnx", model_kwargs=model_kwargs)
+    if backend == "onnx-int8":
+        file_name = settings.EMBEDDING_ONNX_FILE or DEFAULT_ONNX_INT8_FILE
+        return SentenceTransformer(settings.EMBEDDING_MODEL, backend="onnx", model_kwargs={"file_name": file_name})
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
 
 def load_embedding_model():
-    global embedding_model
-    if embedding_model is None:
-        print(f"DEBUG: Loading embedding model: {settings.EMBEDDING_MODEL}")
-        embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    global embedding_model, embedding_backend
+    if embedding_model is not None:
+        return
+    with _load_lock:
+        if embedding_model is not None:
+            return
+        backend = settings.EMBEDDING_BACKEND.lower()
+        print(f"DEBUG: Loading embedding model: {settings.EMBEDDING_MODEL} (backend={backend})")
+        try:
+            embedding_model = create_embedding_model(backend)
+        except Exception as e:
+            if backend == "torch":
+                raise
+            # A missing onnxruntime/optimum or export file should not take retrieval down
+            print(f"WARNING: Embedding backend {backend} unavailable, falling back to torch: {e}")
+            backend = "torch"
+            embedding_model = create_embedding_model(backend)
+        embedding_backend = backend
         print("DEBUG: Embedding model loaded successfully")
 
 def get_embedding(text: str):
     if not embedding_model:
         load_embedding_model()
-    
+
     # Encode returns numpy array, convert to list
     embedding = embedding_model.encode(text).tolist()
     print(f"DEBUG: Generated embedding of length {len(embedding)} for text: {text[:50]}...")
     return embedding
+
+def _query_cache_key(text: str) -> tuple:
+    return (settings.EMBEDDING_MODEL, embedding_backend or settings.EMBEDDING_BACKEND.lower(), " ".join(text.split()))
+
+def get_query_embedding(text: str) -> List[float]:
+    """
+    get_embedding() for question texts, served from the LRU/TTL query cache when the same
+    (whitespace-normalized) question was embedded recently by the same model and backend.
+    """
+    key = _query_cache_key(text)
+    cached = query_embedding_cache.get(key)
+    if cached is not None:
+        QUERY_EMBEDDING_CACHE.inc(result="hit")
+        return list(cached)
+    QUERY_EMBEDDING_CACHE.inc(result="miss")
+    embedding = get_embedding(key[2])
+    # Re-key after the first call: loading the model may have fallen back to another backend
+    query_embedding_cache.put(_query_cache_key(text), tuple(embedding))
+    return embedding
+
+def get_embeddings(texts: List[str], batch_size: int = None) -> List[List[float]]:
+    """
+    Encode a list of texts in batched forward passes.
+    Vectors are L2-normalized float32, so cosine similarity reduces to a dot product.
+    """
+    if not texts:
+        return []
+
+    if not embedding_model:
+        load_embedding_model()
+
+    batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+    vectors = embedding_model.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    ).astype(np.float32, copy=False)
+    print(f"DEBUG: Generated {len(texts)} embeddings of length {vectors.shape[1]} (batch_size={batch_size})")
+    return vectors.tolist()
+
+def encode_embedding(vector: Any) -> bytes:
+    """Pack an embedding (list, numpy array or already-packed bytes) into the stored float32 byte form"""
+    if vector is None:
+        return b""
+    if isinstance(vector, (bytes, bytearray)):
+        return bytes(vector)
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+def decode_embedding(value: Any) -> np.ndarray:
+    """
+    Unpack a stored embedding into a float32 vector.
+    Accepts the packed byte form and legacy list-of-floats properties; missing values decode to an empty vector.
+    """
+    if value is None:
+        return np.empty(0, dtype=np.float32)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=EMBEDDING_DTYPE).astype(np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+def decode_embeddings(values: Sequence[Any]) -> np.ndarray:
+    """Stack stored embeddings into an (n, dim) float32 matrix; every value must have the same dimension"""
+    if not values:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.vstack([decode_embedding(value) for value in values])
@@ -1,9 +1,13 @@
 import re
+import threading
+from typing import List, Dict
 from app.core.config import settings
 
 nlp_model = None
 _spacy_module = None
 _spacy_import_error = None
+# Background warm-up and the first ingestion job may both ask for the model
+_load_lock = threading.Lock()
 
 
 def _get_spacy_module():
@@ -56,7 +60,13 @@ def _extract_regex_entities(text: str):
 def load_nlp_model():
     global nlp_model
 
-    if nlp_model is None:
+    if nlp_model is not None:
+        return
+
+    with _load_lock:
+        if nlp_model is not None:
+            return
+
         spacy = _get_spacy_module()
         if spacy is None:
             return
@@ -73,6 +83,21 @@ def load_nlp_model():
             print(f"ERROR loading spaCy model: {e}")
             return
 
+SPACY_ENTITY_LABELS = {"PERSON", "ORG", "GPE", "DATE", "TIME", "MONEY", "PRODUCT", "EVENT", "LAW", "NORP"}
+
+
+def _extract_spacy_entities(doc):
+    # SpaCy entities - expanded to capture more types
+    return [
+        {"name": ent.text, "type": ent.label_}
+        for ent in doc.ents
+        if ent.label_ in SPACY_ENTITY_LABELS
+    ]
+
+def _ner_only_disabled_pipes(model) -> List[str]:
+    """Every pipeline component except NER; only doc.ents is read downstream."""
+    return [name for name in model.pipe_names if name != "ner"]
+
 def extract_entities(text: str):
     entities = _extract_regex_entities(text)
 
@@ -82,13 +107,39 @@ def extract_entities(text: str):
     if nlp_model:
         try:
             doc = nlp_model(text)
-
-            # SpaCy entities - expanded to capture more types
-            for ent in doc.ents:
-                if ent.label_ in ["PERSON", "ORG", "GPE", "DATE", "TIME", "MONEY", "PRODUCT", "EVENT", "LAW", "NORP"]:
-                    entities.append({"name": ent.text, "type": ent.label_})
+            entities.extend(_extract_spacy_entities(doc))
         except Exception as e:
             print(f"ERROR during spaCy entity extraction: {e}")
 
     print(f"Extracted {len(entities)} entities from text")
     return entities
+
+def extract_entities_batch(texts: List[str], batch_size: int = None, n_process: int = None) -> List[List[Dict[str, str]]]:
+    """
+    Extract entities for many texts at once using nlp.pipe with a NER-only pipeline.
+    Returns one entity list per input text, in input order.
+    """
+    results = [_extract_regex_entities(text) for text in texts]
+    if not texts:
+        return results
+
+    if not nlp_model:
+        load_nlp_model()
+
+    if nlp_model:
+        batch_size = batch_size or settings.NER_BATCH_SIZE
+        n_process = n_process or settings.NER_N_PROCESS
+        try:
+            docs = nlp_model.pipe(
+                texts,
+                batch_size=batch_size,
+                n_process=n_process,
+                disable=_ner_only_disabled_pipes(nlp_model),
+            )
+            for entities, doc in zip(results, docs):
+                entities.extend(_extract_spacy_entities(doc))
+        except Exception as e:
+            print(f"ERROR during batched spaCy entity extraction: {e}")
+
+    print(f"Extracted {sum(len(e) for e in results)} entities from {len(texts)} texts")
+    return results
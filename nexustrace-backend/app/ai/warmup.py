@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+
+from app.ai import embeddings, nlp
+from app.core.config import settings
+
+# Seconds clients are asked to wait (Retry-After) when a model is still warming up
+WARMUP_RETRY_AFTER_SECONDS = 5
+
+
+def _warm_ner() -> str:
+    nlp.load_nlp_model()
+    if nlp.nlp_model is None:
+        return "spaCy unavailable, regex-only entity extraction"
+    return f"model={settings.SPACY_MODEL}"
+
+
+def _warm_embeddings() -> str:
+    embeddings.load_embedding_model()
+    # The first encode() initialises kernels/sessions; pay for it here rather than on the first request
+    embeddings.embedding_model.encode("warm-up", show_progress_bar=False)
+    return f"backend={embeddings.embedding_backend}"
+
+
+MODEL_LOADERS: Dict[str, Callable[[], str]] = {
+    "ner": _warm_ner,
+    "embeddings": _warm_embeddings,
+}
+
+_states: Dict[str, Dict[str, Any]] = {
+    name: {"status": "pending", "detail": None, "seconds": None} for name in MODEL_LOADERS
+}
+_lock = threading.Lock()
+_started = False
+
+
+def _set_state(name: str, **values):
+    with _lock:
+        _states[name].update(values)
+
+
+def _warm(name: str):
+    _set_state(name, status="loading")
+    started = time.perf_counter()
+    try:
+        detail = MODEL_LOADERS[name]()
+    except Exception as e:
+        print(f"ERROR: {name} model warm-up failed: {e}")
+        _set_state(name, status="failed", detail=str(e), seconds=round(time.perf_counter() - started, 2))
+        return
+    elapsed = round(time.perf_counter() - started, 2)
+    _set_state(name, status="ready", detail=detail, seconds=elapsed)
+    print(f"{name} model ready in {elapsed}s")
+
+
+def start_model_warmup():
+    """Load every model on its own daemon thread so startup returns immediately"""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    for name in MODEL_LOADERS:
+        threading.Thread(target=_warm, args=(name,), name=f"warmup-{name}", daemon=True).start()
+
+
+def model_status() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        return {name: dict(state) for name, state in _states.items()}
+
+
+def models_ready(*names: str) -> bool:
+    with _lock:
+        return all(_states[name]["status"] == "ready" for name in names)
+
+
+def require_models(*names: str) -> Callable[[], None]:
+    """FastAPI dependency that answers 503 straight away until the named models are loaded"""
+    def dependency():
+        statuses = model_status()
+        not_ready = [name for name in names if statuses[name]["status"] != "ready"]
+        if not not_ready:
+            return
+        failed = [name for name in not_ready if statuses[name]["status"] == "failed"]
+        if failed:
+            detail = f"Model(s) failed to load: {', '.join(failed)}. See /health/ready."
+        else:
+            detail = f"Model(s) still warming up: {', '.join(not_ready)}. Please retry shortly."
+        raise HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(WARMUP_RETRY_AFTER_SECONDS)},
+        )
+    return dependency
@@ -7,7 +7,6 @@ import smtplib
 import ssl
 import time
 import certifi
-import requests
 import uuid
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password, create_access_token
@@ -29,6 +28,9 @@ class AuthService:
             print("DEBUG: SMTP_FROM_EMAIL not configured. Skipping MailerSend email.")
             return False
 
+        # requests is imported on first use to keep app import time down
+        import requests
+
         try:
             response = requests.post(
                 "https://api.mailersend.com/v1/email",
@@ -85,6 +87,8 @@ class AuthService:
             if not settings.SMTP_FROM_EMAIL:
                 print("DEBUG: SMTP_FROM_EMAIL not configured. Skipping reset email.")
                 return
+            import requests
+
             try:
                 response = requests.post(
                     "https://api.sendgrid.com/v3/mail/send",
@@ -2,6 +2,7 @@ import uuid
 from neo4j import Session
 from fastapi import HTTPException
 from app.schemas.case import CaseCreate, CaseResponse, CaseUpdate
+from app.rag import ann_index, vector_index
 
 class CaseService:
     def __init__(self, session: Session, user_id: str):
@@ -246,6 +247,8 @@ class CaseService:
         evidence_deleted = int((subtree_delete_result or {}).get("evidence_deleted", 0))
         chunks_deleted = int((subtree_delete_result or {}).get("chunks_deleted", 0))
         case_deleted = int((subtree_delete_result or {}).get("case_deleted", 0))
+        vector_index.invalidate_case(case_id)
+        ann_index.drop_case(case_id)
 
         # 7) Cleanup global orphans that can be left by previous partial deletes.
         orphan_chunk_cleanup = self.session.run(
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with an optional time-to-live per entry.
+    max_size <= 0 disables caching; ttl_seconds <= 0 keeps entries until they are evicted.
+    With `weigh` and max_weight > 0, least recently used entries are also evicted until the
+    summed weight (e.g. bytes) fits; a single entry heavier than max_weight is not cached.
+    on_evict(key, value) runs, outside the lock, for entries pushed out by size or weight.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float = 0,
+        max_weight: int = 0,
+        weigh: Callable[[Any], int] = None,
+        on_evict: Callable[[Hashable, Any], None] = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_weight = max_weight if weigh else 0
+        self._weigh = weigh
+        self._on_evict = on_evict
+        self._weight = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _live_entry(self, key: Hashable):
+        # Caller holds the lock; expired entries are dropped on access
+        entry = self._entries.get(key, _MISSING)
+        if entry is not _MISSING and self.ttl_seconds > 0 and time.monotonic() - entry[1] > self.ttl_seconds:
+            self._remove(key)
+            entry = _MISSING
+        return entry
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._weight -= entry[2]
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like get(), without touching recency or the hit/miss counters"""
+        with self._lock:
+            entry = self._live_entry(key)
+            return default if entry is _MISSING else entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+        weight = self._weigh(value) if self._weigh else 0
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_weight and weight > self.max_weight:
+                evicted.append((key, value))
+            else:
+                self._entries[key] = (value, time.monotonic(), weight)
+                self._weight += weight
+            while len(self._entries) > self.max_size or (self.max_weight and self._weight > self.max_weight):
+                oldest = next(iter(self._entries))
+                evicted.append((oldest, self._remove(oldest)[0]))
+                self.evictions += 1
+        if self._on_evict:
+            for evicted_key, evicted_value in evicted:
+                self._on_evict(evicted_key, evicted_value)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._remove(key) if key in self._entries else None
+        return entry[0] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "weight": self._weight,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
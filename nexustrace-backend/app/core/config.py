@@ -29,11 +29,56 @@ class Settings(BaseSettings):
     CLOUDFLARE_IMAGE_MODEL: str = "@cf/leonardo/phoenix-1.0"
 
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"  # torch | onnx | onnx-int8
+    EMBEDDING_ONNX_FILE: str = ""  # ONNX export inside the model repo; empty = backend default
     SPACY_MODEL: str = "en_core_web_sm"
-    
+    EMBEDDING_BATCH_SIZE: int = 64
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1024  # cached question embeddings; 0 = disabled
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: int = 3600  # 0 = keep until evicted
+    NER_BATCH_SIZE: int = 64
+    NER_N_PROCESS: int = 1
+
     MAX_CHUNK_TOKENS: int = 600
     CHUNK_OVERLAP: int = 100
+    LOG_CHUNKING_MODE: str = "auto"  # auto | lines | tokens
+    CSV_CHUNK_ROWS: int = 50
+    JSON_CHUNK_RECORDS: int = 50
     TOP_K_RETRIEVAL: int = 5
+    EMBEDDING_DIMENSIONS: int = 384  # must match EMBEDDING_MODEL; sizes the Neo4j vector index
+    VECTOR_INDEX_ENABLED: bool = True  # use db.index.vector.queryNodes when the server supports it
+    VECTOR_INDEX_OVERSAMPLE: int = 10  # index candidates per wanted hit (the index spans all cases)
+    VECTOR_INDEX_MAX_CANDIDATES: int = 10000
+    VECTOR_SEARCH_BACKEND: str = "neo4j"  # neo4j (vector index, scan fallback) | memory (in-process per-case NumPy index)
+    VECTOR_MEMORY_INDEX_MAX_CASES: int = 32
+    VECTOR_MEMORY_INDEX_MAX_MB: int = 512
+    VECTOR_MEMORY_INDEX_TTL_SECONDS: int = 600  # reload period; bounds staleness across worker processes, 0 = never
+    ANN_INDEX_DIR: str = ""  # empty = nexustrace-backend/ann_indexes
+    ANN_MIN_CHUNKS: int = 50000  # smaller cases use exact in-memory search under VECTOR_SEARCH_BACKEND=ann
+    ANN_M: int = 16  # HNSW links per node
+    ANN_EF_CONSTRUCTION: int = 200
+    ANN_EF_SEARCH: int = 64  # higher = better recall, slower queries
+    ANN_CACHE_MAX_MB: int = 4096
+    GRAPH_WRITE_BATCH_SIZE: int = 500
+    INGESTION_WORKERS: int = 2
+    INGESTION_WINDOW_CHUNKS: int = 256  # also the checkpoint granularity: a resume repeats at most one window
+    INGESTION_JOB_LEASE_SECONDS: int = 60  # unrenewed queued/running jobs are failed after this
+    UPLOAD_SPOOL_DIR: str = ""  # empty = system temp dir
+    UPLOAD_SPOOL_BLOCK_SIZE: int = 1048576
+    PDF_EXTRACT_WORKERS: int = 0  # 0 = one per CPU core
+    PDF_PARALLEL_MIN_PAGES: int = 40
+    ARCHIVE_MEMBER_WORKERS: int = 4  # members of one archive ingested concurrently
+    ARCHIVE_MAX_MEMBERS: int = 1000  # reading stops at this many ingested members
+    ARCHIVE_MAX_MEMBER_BYTES: int = 1073741824  # decompressed size of one member
+    ARCHIVE_MAX_TOTAL_BYTES: int = 4294967296  # decompressed size of all spooled members of one archive
+    OCR_WORKERS: int = 2  # concurrent Tesseract processes; 0 = one per CPU core
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_DIR: str = ""  # empty = <system temp>/nexustrace-ocr-cache
+    OCR_LANG: str = "eng"
+    OCR_TESSERACT_CONFIG: str = ""
+    OCR_MAX_DIMENSION: int = 0  # downscale longer side to this many pixels; 0 = keep original
+    OCR_PREPROCESS: str = "none"  # none | grayscale | threshold
+
+    METRICS_ENABLED: bool = True  # serve GET /metrics (Prometheus text format)
 
     PASSWORD_RESET_TOKEN_TTL_MINUTES: int = 30
 
@@ -649,16 +649,19 @@ class AttackChainService:
         entities: List[str],
         base_risk: float,
         chunk_order: int,
+        line_offsets: Optional[List[int]] = None,
     ) -> List[Dict[str, Any]]:
         fallback_dt = self._to_datetime(chunk_timestamp_iso)
-        line_candidates = [
-            line.strip()
-            for line in chunk_text.splitlines()
-            if line.strip() and not line.strip().startswith("#")
-        ]
+        if line_offsets:
+            # Chunked on record boundaries at ingestion: slice records by their stored offsets
+            bounds = list(line_offsets) + [len(chunk_text) + 1]
+            line_candidates = [chunk_text[start:end - 1].strip() for start, end in zip(bounds, bounds[1:])]
+        else:
+            line_candidates = [line.strip() for line in chunk_text.splitlines()]
+        line_candidates = [line for line in line_candidates if line and not line.startswith("#")]
 
         lines = line_candidates
-        if len(lines) <= 1:
+        if len(lines) <= 1 and not line_offsets:
             lines = self._split_compact_log_entries(chunk_text)
 
         if not lines:
@@ -768,6 +771,7 @@ class AttackChainService:
             RETURN ch.chunk_id as chunk_id,
                    ts as timestamp,
                    ch.text as text,
+                   ch.line_offsets as line_offsets,
                    risk as risk_score,
                    e.filename as filename,
                    entity_names
@@ -779,7 +783,10 @@ class AttackChainService:
 
         events: List[Dict[str, Any]] = []
         for index, record in enumerate(results):
-            raw_text = (record["text"] or "").strip()
+            raw_text = record["text"] or ""
+            line_offsets = record["line_offsets"]
+            if not line_offsets:
+                raw_text = raw_text.strip()
             entities = [name for name in (record["entity_names"] or []) if name]
             timestamp_iso = self._parse_timestamp(record["timestamp"])
 
@@ -798,6 +805,7 @@ class AttackChainService:
                 entities=entities,
                 base_risk=max(0.0, min(risk_score, 1.0)),
                 chunk_order=index,
+                line_offsets=line_offsets,
             )
             events.extend(chunk_events)
 
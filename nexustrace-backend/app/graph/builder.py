@@ -1,16 +1,28 @@
+import time
 from neo4j import Session
-from typing import List, Dict, Any
+from neo4j.exceptions import ClientError
+from typing import List, Dict, Any, Optional
+from app.ai.embeddings import decode_embedding, encode_embedding
+from app.core.config import settings
 
 class GraphBuilder:
     MAX_CO_OCCUR_ENTITIES_PER_CHUNK = 60
+    # Vector index over a float32 array copy of the packed embedding (vector indexes cannot read byte arrays).
+    # Both copies are kept on purpose: the index needs the array, while every bulk reader (dedup lookups,
+    # the exact scan, in-memory/ANN index loads) reads the packed bytes. Bolt has no float32 list type, so
+    # the array crosses the wire as 384 64-bit floats (~3.5 KB vs 1.5 KB) and decodes float by float.
+    VECTOR_INDEX_NAME = "chunk_embedding_index"
+    VECTOR_PROPERTY = "embedding_vector"
+    _indexes_ensured = False
+    _vector_index_available: Optional[bool] = None
 
     def __init__(self, session: Session):
         self.session = session
-    
-    def _create_entity_relationships(self, entities: List[Dict[str, str]], chunk_id: str):
-        """Create relationships between entities that co-occur in the same chunk"""
+
+    def _co_occurrence_pairs(self, entities: List[Dict[str, str]], chunk_id: str) -> List[Dict[str, str]]:
+        """Sorted, deduplicated entity name pairs for one chunk"""
         if not entities:
-            return
+            return []
 
         # Deduplicate by name while preserving first-seen order.
         unique_names: List[str] = []
@@ -32,7 +44,7 @@ class GraphBuilder:
             unique_names = unique_names[: self.MAX_CO_OCCUR_ENTITIES_PER_CHUNK]
 
         if len(unique_names) < 2:
-            return
+            return []
 
         pair_set = set()
         pairs = []
@@ -45,121 +57,330 @@ class GraphBuilder:
                 pair_set.add(key)
                 pairs.append({"name1": name1, "name2": name2})
 
-        if not pairs:
-            return
-
-        try:
-            query = """
-            UNWIND $pairs as pair
-            MATCH (e1:Entity {name: pair.name1})
-            MATCH (e2:Entity {name: pair.name2})
-            MERGE (e1)-[r:CO_OCCURS]->(e2)
-            ON CREATE SET r.count = 1, r.chunk_ids = [$chunk_id]
-            ON MATCH SET
-                r.count = coalesce(r.count, 0) + 1,
-                r.chunk_ids = CASE
-                    WHEN $chunk_id IN coalesce(r.chunk_ids, []) THEN coalesce(r.chunk_ids, [])
-                    ELSE coalesce(r.chunk_ids, []) + $chunk_id
-                END
-            RETURN count(r) as rel_count
-            """
-            result = self.session.run(query, pairs=pairs, chunk_id=chunk_id).single()
-            rel_count = result["rel_count"] if result else 0
-            if rel_count:
-                print(f"Created/updated {rel_count} entity relationships")
-        except Exception as e:
-            print(f"  ✗ Error creating co-occurrence relationships for chunk {chunk_id}: {e}")
+        return pairs
 
-    def create_evidence_node(self, user_id: str, case_id: str, evidence_id: str, filename: str, file_type: str):
+    def create_evidence_node(self, user_id: str, case_id: str, evidence_id: str, filename: str, file_type: str, content_hash: str = None):
         query = """
         MATCH (c:Case {case_id: $case_id})
         CREATE (e:Evidence {
             evidence_id: $evidence_id,
             filename: $filename,
             file_type: $file_type,
+            content_hash: $content_hash,
+            status: 'processing',
+            chunks_committed: 0,
             uploaded_at: timestamp()
         })
         CREATE (c)-[:HAS_EVIDENCE]->(e)
         RETURN e.evidence_id as evidence_id
         """
-        result = self.session.run(query, case_id=case_id, evidence_id=evidence_id, filename=filename, file_type=file_type)
+        result = self.session.run(query, case_id=case_id, evidence_id=evidence_id, filename=filename, file_type=file_type, content_hash=content_hash)
         record = result.single()
         if record:
             print(f"Successfully created evidence node: {record['evidence_id']}")
         return record
 
-    def store_chunk(self, user_id: str, case_id: str, chunk: Dict[str, Any], embedding: List[float], risk_score: float, entities: List[Dict[str, str]]):
+    def find_evidence_by_content_hash(self, user_id: str, content_hash: str) -> List[Dict[str, Any]]:
+        """The user's evidence nodes (across their cases) whose uploaded bytes have the given SHA-256"""
         query = """
-        MATCH (c:Case {case_id: $case_id})-[:HAS_EVIDENCE]->(e:Evidence {evidence_id: $evidence_id})
-        CREATE (ch:Chunk {
-            chunk_id: $chunk_id,
-            case_id: $case_id,
-            text: $text,
-            timestamp: $timestamp,
-            risk_score: $risk_score,
-            embedding: $embedding,
-            filename: $filename,
-            file_type: $file_type,
-            page_number: $page_number,
-            chunk_index: $chunk_index
-        })
-        CREATE (e)-[:HAS_CHUNK]->(ch)
-        RETURN ch.chunk_id as chunk_id
+        MATCH (u:User {id: $user_id})-[:CREATED]->(c:Case)-[:HAS_EVIDENCE]->(e:Evidence {content_hash: $content_hash})
+        RETURN e.evidence_id as evidence_id, c.case_id as case_id, e.filename as filename
+        """
+        return [record.data() for record in self.session.run(query, user_id=user_id, content_hash=content_hash)]
+
+    def find_chunks_by_text_hash(self, user_id: str, text_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Previously computed triage results keyed by chunk text hash: embedding (decoded float32), risk score
+        and the entities the chunk MENTIONS. Only chunks with a non-empty stored embedding are reused, and
+        only from the user's own cases, so one tenant can never learn whether another uploaded a text.
+        Chunks whose triage failed are stored without a text_hash and never match; of the remaining
+        copies, the one with the most entity mentions wins (older data may still hold hashed copies whose
+        NER failed).
+        """
+        if not text_hashes:
+            return {}
+        query = """
+        UNWIND $hashes as h
+        CALL {
+            WITH h
+            MATCH (ch:Chunk {text_hash: h})
+            WHERE ch.embedding IS NOT NULL
+              AND size(ch.embedding) > 0
+              AND (ch)<-[:HAS_CHUNK]-(:Evidence)<-[:HAS_EVIDENCE]-(:Case)<-[:CREATED]-(:User {id: $user_id})
+            WITH ch, size([(ch)-[:MENTIONS]->(:Entity) | 1]) as mentions
+            RETURN ch
+            ORDER BY mentions DESC
+            LIMIT 1
+        }
+        RETURN h as text_hash,
+               ch.embedding as embedding,
+               ch.risk_score as risk_score,
+               [(ch)-[:MENTIONS]->(ent:Entity) | {name: ent.name, type: ent.type}] as entities
+        """
+        found = {}
+        for record in self.session.run(query, user_id=user_id, hashes=list(text_hashes)):
+            embedding = decode_embedding(record["embedding"])
+            if not embedding.size:
+                continue
+            found[record["text_hash"]] = {
+                "embedding": embedding,
+                "risk_score": record["risk_score"] or 0.0,
+                "entities": record["entities"] or [],
+            }
+        return found
+
+    def get_evidence_checkpoint(self, evidence_id: str) -> Optional[Dict[str, Any]]:
+        """Ingestion state of an evidence node: status, content hash and how many chunks are committed"""
+        record = self.session.run(
+            """
+            MATCH (c:Case)-[:HAS_EVIDENCE]->(e:Evidence {evidence_id: $evidence_id})
+            RETURN c.case_id as case_id,
+                   e.status as status,
+                   e.content_hash as content_hash,
+                   coalesce(e.chunks_committed, 0) as chunks_committed
+            """,
+            evidence_id=evidence_id,
+        ).single()
+        return dict(record) if record else None
+
+    def set_evidence_checkpoint(self, evidence_id: str, chunks_committed: int):
+        """Every chunk with chunk_index < chunks_committed is fully written (chunk, mentions, co-occurrences)"""
+        self.session.run(
+            "MATCH (e:Evidence {evidence_id: $evidence_id}) SET e.chunks_committed = $chunks_committed",
+            evidence_id=evidence_id,
+            chunks_committed=chunks_committed,
+        ).consume()
+
+    def set_evidence_status(self, evidence_id: str, status: str):
+        self.session.run(
+            "MATCH (e:Evidence {evidence_id: $evidence_id}) SET e.status = $status",
+            evidence_id=evidence_id,
+            status=status,
+        ).consume()
+
+    def ensure_ingestion_indexes(self):
+        """Lookup indexes the bulk writer MATCHes/MERGEs on; created once per process"""
+        if GraphBuilder._indexes_ensured:
+            return
+        for statement in (
+            "CREATE INDEX chunk_id_index IF NOT EXISTS FOR (ch:Chunk) ON (ch.chunk_id)",
+            "CREATE INDEX entity_name_index IF NOT EXISTS FOR (ent:Entity) ON (ent.name)",
+            "CREATE INDEX evidence_id_index IF NOT EXISTS FOR (e:Evidence) ON (e.evidence_id)",
+            "CREATE INDEX chunk_text_hash_index IF NOT EXISTS FOR (ch:Chunk) ON (ch.text_hash)",
+            "CREATE INDEX evidence_content_hash_index IF NOT EXISTS FOR (e:Evidence) ON (e.content_hash)",
+            "CREATE INDEX chunk_time_range_index IF NOT EXISTS FOR (ch:Chunk) ON (ch.case_id, ch.timestamp_start)",
+        ):
+            try:
+                self.session.run(statement).consume()
+            except Exception as e:
+                print(f"  [WARN] Could not ensure index ({statement}): {e}")
+                return
+        GraphBuilder._indexes_ensured = True
+
+    def ensure_vector_index(self) -> bool:
+        """
+        Schema bootstrap for the Chunk vector index (CREATE VECTOR INDEX and
+        db.create.setNodeVectorProperty need Neo4j 5.13+). Returns whether vector search is
+        available; the answer is cached per process and always False with VECTOR_INDEX_ENABLED off.
+        """
+        if not settings.VECTOR_INDEX_ENABLED:
+            return False
+        if GraphBuilder._vector_index_available is not None:
+            return GraphBuilder._vector_index_available
+        statement = f"""
+        CREATE VECTOR INDEX {self.VECTOR_INDEX_NAME} IF NOT EXISTS
+        FOR (ch:Chunk) ON (ch.{self.VECTOR_PROPERTY})
+        OPTIONS {{indexConfig: {{
+            `vector.dimensions`: {int(settings.EMBEDDING_DIMENSIONS)},
+            `vector.similarity_function`: 'cosine'
+        }}}}
         """
         try:
-            result = self.session.run(query, 
-                             case_id=case_id,
-                             evidence_id=chunk["evidence_id"],
-                             chunk_id=chunk["chunk_id"],
-                             text=chunk["text"],
-                             timestamp=chunk.get("timestamp"),
-                             risk_score=risk_score,
-                             embedding=embedding,
-                             filename=chunk.get("filename", ""),
-                             file_type=chunk.get("file_type", ""),
-                             page_number=chunk.get("page_number"),
-                             chunk_index=chunk.get("chunk_index", 0))
-            record = result.single()
-            if record:
-                print(f"✓ Stored chunk: {record['chunk_id']}")
-            else:
-                print(f"⚠ Warning: Chunk created but no record returned")
+            self.session.run(statement).consume()
+            record = self.session.run(
+                "SHOW PROCEDURES YIELD name WHERE name = 'db.create.setNodeVectorProperty' RETURN count(*) as found"
+            ).single()
+            available = bool(record and record["found"])
+        except ClientError as e:
+            # Syntax or procedure errors mean the server has no vector support; remember that
+            print(f"  [WARN] Neo4j vector index unavailable, retrieval will scan case embeddings: {e}")
+            available = False
         except Exception as e:
-            print(f"✗ Error storing chunk: {e}")
-            raise
-        
-        # Create Entity nodes and relationships
-        entities_created = 0
-        for entity in entities:
-             try:
-                 query_entity = """
-                 MATCH (c:Case {case_id: $case_id})
-                 MATCH (ch:Chunk {chunk_id: $chunk_id})
-                 MERGE (ent:Entity {name: $name})
-                 ON CREATE SET ent.type = $type, ent.created_at = timestamp()
-                 ON MATCH SET ent.type = $type
-                 MERGE (ch)-[:MENTIONS]->(ent)
-                 MERGE (c)-[:HAS_ENTITY]->(ent)
-                 RETURN ent.name as name, ent.type as type
-                 """
-                 result = self.session.run(query_entity, 
-                                  chunk_id=chunk["chunk_id"], 
-                                  case_id=case_id,
-                                  name=entity["name"], 
-                                  type=entity["type"])
-                 record = result.single()
-                 if record:
-                     entities_created += 1
-                     print(f"  ✓ Entity: {record['name']} ({record['type']})")
-                 else:
-                     print(f"  ⚠ Entity created but no record: {entity['name']}")
-             except Exception as e:
-                 print(f"  ✗ Error storing entity '{entity['name']}': {e}")
-                 # Continue processing other entities even if one fails
-                 continue
-        
-        print(f"Stored {entities_created}/{len(entities)} entities for chunk")
-        
-        # Create relationships between co-occurring entities
-        if len(entities) > 1:
-            self._create_entity_relationships(entities, chunk["chunk_id"])
+            # Connection trouble says nothing about the server version; try again next time
+            print(f"  [WARN] Could not ensure vector index: {e}")
+            return False
+        GraphBuilder._vector_index_available = available
+        print(f"Vector index {self.VECTOR_INDEX_NAME}: {'ready' if available else 'not supported'}")
+        return available
+
+    @staticmethod
+    def _write_chunks_tx(tx, case_id: str, evidence_id: str, rows: List[Dict[str, Any]]):
+        query = """
+        MATCH (c:Case {case_id: $case_id})-[:HAS_EVIDENCE]->(e:Evidence {evidence_id: $evidence_id})
+        UNWIND $rows as row
+        MERGE (ch:Chunk {chunk_id: row.chunk_id})
+        SET ch += row {
+            .text, .text_hash, .timestamp, .timestamp_start, .timestamp_end,
+            .line_offsets, .record_start, .record_end, .risk_score, .embedding,
+            .filename, .file_type, .page_number, .chunk_index
+        },
+            ch.case_id = $case_id
+        MERGE (e)-[:HAS_CHUNK]->(ch)
+        RETURN count(ch) as written
+        """
+        record = tx.run(query, case_id=case_id, evidence_id=evidence_id, rows=rows).single()
+        return record["written"] if record else 0
+
+    @staticmethod
+    def _write_vectors_tx(tx, rows: List[Dict[str, Any]]):
+        # setNodeVectorProperty stores a float32 array, which is what the vector index reads
+        query = f"""
+        UNWIND $rows as row
+        MATCH (ch:Chunk {{chunk_id: row.chunk_id}})
+        CALL db.create.setNodeVectorProperty(ch, '{GraphBuilder.VECTOR_PROPERTY}', row.vector)
+        RETURN count(ch) as written
+        """
+        record = tx.run(query, rows=rows).single()
+        return record["written"] if record else 0
+
+    @staticmethod
+    def _write_mentions_tx(tx, rows: List[Dict[str, str]]):
+        query = """
+        UNWIND $rows as row
+        MATCH (ch:Chunk {chunk_id: row.chunk_id})
+        MERGE (ent:Entity {name: row.name})
+        ON CREATE SET ent.type = row.type, ent.created_at = timestamp()
+        ON MATCH SET ent.type = row.type
+        MERGE (ch)-[:MENTIONS]->(ent)
+        RETURN count(ent) as written
+        """
+        record = tx.run(query, rows=rows).single()
+        return record["written"] if record else 0
+
+    @staticmethod
+    def _write_case_entities_tx(tx, case_id: str, names: List[str]):
+        query = """
+        MATCH (c:Case {case_id: $case_id})
+        UNWIND $names as name
+        MATCH (ent:Entity {name: name})
+        MERGE (c)-[:HAS_ENTITY]->(ent)
+        RETURN count(ent) as written
+        """
+        record = tx.run(query, case_id=case_id, names=names).single()
+        return record["written"] if record else 0
+
+    @staticmethod
+    def _write_co_occurrences_tx(tx, rows: List[Dict[str, str]]):
+        query = """
+        UNWIND $rows as pair
+        MATCH (e1:Entity {name: pair.name1})
+        MATCH (e2:Entity {name: pair.name2})
+        MERGE (e1)-[r:CO_OCCURS]->(e2)
+        ON CREATE SET r.count = 1, r.chunk_ids = [pair.chunk_id]
+        ON MATCH SET
+            r.count = CASE
+                WHEN pair.chunk_id IN coalesce(r.chunk_ids, []) THEN coalesce(r.count, 1)
+                ELSE coalesce(r.count, 0) + 1
+            END,
+            r.chunk_ids = CASE
+                WHEN pair.chunk_id IN coalesce(r.chunk_ids, []) THEN coalesce(r.chunk_ids, [])
+                ELSE coalesce(r.chunk_ids, []) + pair.chunk_id
+            END
+        RETURN count(r) as written
+        """
+        record = tx.run(query, rows=rows).single()
+        return record["written"] if record else 0
+
+    def _flush(self, stage: str, rows: list, tx_fn, batch_size: int, timings: List[Dict[str, Any]], *args):
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            started = time.perf_counter()
+            written = self.session.execute_write(tx_fn, *args, batch)
+            elapsed = time.perf_counter() - started
+            timings.append({"stage": stage, "rows": len(batch), "written": written, "seconds": round(elapsed, 4)})
+            print(f"  [bulk] {stage}: {len(batch)} rows in {elapsed * 1000:.1f} ms")
+
+    def store_chunks_bulk(self, case_id: str, evidence_id: str, processed: List[Dict[str, Any]], batch_size: int = None) -> Dict[str, Any]:
+        """
+        Write all processed chunks of one evidence file with a handful of UNWIND statements.
+
+        `processed` items carry keys: chunk, embedding, risk_score, entities.
+        Stages run in order (chunks, entities + MENTIONS, HAS_ENTITY, CO_OCCURS), each
+        flushed in managed write transactions of at most `batch_size` rows.
+        Returns per-batch timings and per-stage totals.
+        """
+        batch_size = batch_size or settings.GRAPH_WRITE_BATCH_SIZE
+        self.ensure_ingestion_indexes()
+
+        chunk_rows = []
+        vector_rows = []
+        with_vectors = self.ensure_vector_index()
+        mention_rows = []
+        pair_rows = []
+        seen_mentions = set()
+        entity_names = []
+        seen_names = set()
+
+        for item in processed:
+            chunk = item["chunk"]
+            chunk_id = chunk["chunk_id"]
+            chunk_rows.append({
+                "chunk_id": chunk_id,
+                "text": chunk["text"],
+                "text_hash": chunk.get("text_hash"),
+                "timestamp": chunk.get("timestamp"),
+                "timestamp_start": chunk.get("timestamp_start"),
+                "timestamp_end": chunk.get("timestamp_end"),
+                "line_offsets": chunk.get("line_offsets"),
+                "record_start": chunk.get("record_start"),
+                "record_end": chunk.get("record_end"),
+                "risk_score": item.get("risk_score", 0.0),
+                "embedding": encode_embedding(item.get("embedding")),
+                "filename": chunk.get("filename", ""),
+                "file_type": chunk.get("file_type", ""),
+                "page_number": chunk.get("page_number"),
+                "chunk_index": chunk.get("chunk_index", 0),
+            })
+            if with_vectors:
+                vector = decode_embedding(item.get("embedding"))
+                if vector.size == settings.EMBEDDING_DIMENSIONS:
+                    vector_rows.append({"chunk_id": chunk_id, "vector": vector.tolist()})
+
+            entities = item.get("entities") or []
+            for entity in entities:
+                name = entity.get("name")
+                if not name:
+                    continue
+                key = (chunk_id, name, entity.get("type"))
+                if key in seen_mentions:
+                    continue
+                seen_mentions.add(key)
+                mention_rows.append({"chunk_id": chunk_id, "name": name, "type": entity.get("type")})
+                if name not in seen_names:
+                    seen_names.add(name)
+                    entity_names.append(name)
+
+            if len(entities) > 1:
+                for pair in self._co_occurrence_pairs(entities, chunk_id):
+                    pair["chunk_id"] = chunk_id
+                    pair_rows.append(pair)
+
+        timings: List[Dict[str, Any]] = []
+        self._flush("chunks", chunk_rows, self._write_chunks_tx, batch_size, timings, case_id, evidence_id)
+        self._flush("vectors", vector_rows, self._write_vectors_tx, batch_size, timings)
+        self._flush("mentions", mention_rows, self._write_mentions_tx, batch_size, timings)
+        self._flush("has_entity", entity_names, self._write_case_entities_tx, batch_size, timings, case_id)
+        self._flush("co_occurs", pair_rows, self._write_co_occurrences_tx, batch_size, timings)
+
+        totals: Dict[str, Dict[str, Any]] = {}
+        for timing in timings:
+            stage = totals.setdefault(timing["stage"], {"rows": 0, "batches": 0, "seconds": 0.0})
+            stage["rows"] += timing["rows"]
+            stage["batches"] += 1
+            stage["seconds"] = round(stage["seconds"] + timing["seconds"], 4)
+
+        print(
+            f"Bulk-stored {len(chunk_rows)} chunks, {len(mention_rows)} mentions, "
+            f"{len(pair_rows)} co-occurrence pairs in {len(timings)} transactions"
+        )
+        return {"batches": timings, "stages": totals}
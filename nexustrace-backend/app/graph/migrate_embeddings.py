@@ -0,0 +1,106 @@
+"""
+Convert Chunk.embedding properties stored as Neo4j float lists into packed float32 byte arrays,
+and backfill the vector-index property (Chunk.embedding_vector) where the server supports it.
+
+Chunks are paged by chunk_id, so the migration can be interrupted and re-run; chunks that are
+already packed and indexed are left untouched.
+
+Usage (from nexustrace-backend/):
+    python -m app.graph.migrate_embeddings --batch-size 500 [--dry-run]
+"""
+import argparse
+import sys
+import time
+from typing import Any, Dict, List
+
+from neo4j import Session
+
+from app.ai.embeddings import decode_embedding, encode_embedding
+from app.core.config import settings
+from app.db.neo4j import neo4j_handler
+from app.graph.builder import GraphBuilder
+
+
+def _fetch_page(session: Session, after: str, batch_size: int) -> List[Dict[str, Any]]:
+    query = """
+    MATCH (ch:Chunk)
+    WHERE ch.chunk_id > $after AND ch.embedding IS NOT NULL
+    RETURN ch.chunk_id as chunk_id, ch.embedding as embedding, ch.embedding_vector IS NOT NULL as has_vector
+    ORDER BY ch.chunk_id
+    LIMIT $batch_size
+    """
+    return [dict(record) for record in session.run(query, after=after, batch_size=batch_size)]
+
+
+def _write_packed_tx(tx, rows: List[Dict[str, Any]]):
+    query = """
+    UNWIND $rows as row
+    MATCH (ch:Chunk {chunk_id: row.chunk_id})
+    SET ch.embedding = row.embedding
+    RETURN count(ch) as written
+    """
+    record = tx.run(query, rows=rows).single()
+    return record["written"] if record else 0
+
+
+def migrate_embeddings(session: Session, batch_size: int = 500, dry_run: bool = False) -> Dict[str, int]:
+    """Pack every list-typed chunk embedding and backfill index vectors; returns per-outcome counts"""
+    stats = {"scanned": 0, "converted": 0, "already_packed": 0, "vectors_backfilled": 0}
+    with_vectors = GraphBuilder(session).ensure_vector_index()
+    after = ""
+    while True:
+        page = _fetch_page(session, after, batch_size)
+        if not page:
+            break
+        after = page[-1]["chunk_id"]
+        stats["scanned"] += len(page)
+
+        rows = []
+        vector_rows = []
+        for record in page:
+            if isinstance(record["embedding"], (bytes, bytearray)):
+                stats["already_packed"] += 1
+            else:
+                rows.append({"chunk_id": record["chunk_id"], "embedding": encode_embedding(record["embedding"])})
+            if with_vectors and not record.get("has_vector"):
+                vector = decode_embedding(record["embedding"])
+                if vector.size == settings.EMBEDDING_DIMENSIONS:
+                    vector_rows.append({"chunk_id": record["chunk_id"], "vector": vector.tolist()})
+
+        if not dry_run:
+            if rows:
+                session.execute_write(_write_packed_tx, rows)
+            if vector_rows:
+                session.execute_write(GraphBuilder._write_vectors_tx, vector_rows)
+        stats["converted"] += len(rows)
+        stats["vectors_backfilled"] += len(vector_rows)
+        print(
+            f"  [migrate] scanned {stats['scanned']} chunks, {'would convert' if dry_run else 'converted'} {stats['converted']}, "
+            f"index vectors {stats['vectors_backfilled']}"
+        )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="count list-typed embeddings without rewriting them")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    session = neo4j_handler.get_session()
+    try:
+        stats = migrate_embeddings(session, batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        session.close()
+        neo4j_handler.close()
+    print(
+        f"Scanned {stats['scanned']} chunks: {stats['converted']} {'to convert' if args.dry_run else 'converted'}, "
+        f"{stats['already_packed']} already packed, {stats['vectors_backfilled']} index vectors "
+        f"{'to backfill' if args.dry_run else 'backfilled'} ({time.perf_counter() - started:.1f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -575,6 +575,7 @@ class TimelineService:
         safe_props = dict(props or {})
         if node_type == "Chunk":
             safe_props.pop("embedding", None)
+            safe_props.pop("embedding_vector", None)
             safe_props.pop("text", None)
         return safe_props
 
@@ -0,0 +1,63 @@
+import gzip
+import os
+import tarfile
+import zipfile
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+# Archive kinds keyed by the filename suffixes that select them
+ARCHIVE_SUFFIXES = {
+    ".zip": "zip",
+    ".tar.gz": "tar",
+    ".tgz": "tar",
+    ".tar": "tar",
+    # Checked after the tar suffixes: a plain .gz is one compressed file, e.g. auth.log.gz
+    ".gz": "gzip",
+}
+
+
+def archive_kind(filename: str) -> Optional[str]:
+    """"zip", "tar" or "gzip" for supported archive names, else None"""
+    lowered = (filename or "").lower()
+    for suffix, kind in ARCHIVE_SUFFIXES.items():
+        if lowered.endswith(suffix):
+            return kind
+    return None
+
+
+def _skip_member(name: str) -> bool:
+    # macOS resource forks and dotfiles are never evidence
+    parts = name.replace("\\", "/").split("/")
+    return "__MACOSX" in parts or os.path.basename(name).startswith(".")
+
+
+def iter_archive_members(path: str, kind: str, original_name: str = None) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    Yield (member name, readable stream) for each regular file in a spooled archive.
+    Members are decompressed on demand; a member's stream is only valid until the next one is requested.
+    tar archives are read in stream mode (r|*), so compressed tarballs are never seeked or unpacked up front.
+    A single-file gzip yields one member named after the archive without its .gz suffix.
+    """
+    if kind == "zip":
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or _skip_member(info.filename):
+                    continue
+                with archive.open(info) as stream:
+                    yield info.filename, stream
+    elif kind == "tar":
+        with tarfile.open(path, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile() or _skip_member(member.name):
+                    continue
+                stream = archive.extractfile(member)
+                if stream is None:
+                    continue
+                yield member.name, stream
+    elif kind == "gzip":
+        name = os.path.basename(original_name or path)
+        if name.lower().endswith(".gz"):
+            name = name[:-3]
+        with gzip.open(path, "rb") as stream:
+            yield name, stream
+    else:
+        raise ValueError(f"Unsupported archive kind: {kind}")
@@ -1,115 +1,458 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
+from bisect import bisect_right
 from app.core.config import settings
 import re
-from datetime import datetime
+from datetime import datetime, timezone
+
+# All supported timestamp shapes in one alternation, scanned in a single pass.
+# At any position the earlier alternative wins (ISO before date-only, US date-time before US date).
+_TIMESTAMP_RE = re.compile(
+    # Cheap first-character gate so most positions are rejected before trying the alternatives
+    r"(?=[\d\[JFMASOND])"
+    r"(?:(?P<iso>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)"
+    r"|(?P<us_datetime>\d{1,2}/\d{1,2}/\d{4}\s+\d{2}:\d{2}:\d{2})"
+    r"|\[(?P<apache>\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2})\s+(?P<apache_tz>[+-]\d{4})\]"
+    r"|(?P<syslog>(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})"
+    r"|(?P<date>\d{4}-\d{2}-\d{2})"
+    r"|(?P<us_date>\d{1,2}/\d{1,2}/\d{4}))"
+)
+
+# Which kind supplies the chunk's representative "timestamp" (most specific first)
+_TIMESTAMP_PREFERENCE = ["iso", "us_datetime", "apache", "syslog", "date", "us_date"]
+
+# strptime candidates per kind, always tried in this order: an ambiguous slash date such as
+# 03/04/2024 is month-first, and day-first is only used when month-first cannot parse it
+_STRPTIME_FORMATS = {
+    "us_datetime": ["%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S"],
+    "apache": ["%d/%b/%Y:%H:%M:%S %z"],
+    "syslog": ["%b %d %H:%M:%S %Y"],
+    "us_date": ["%m/%d/%Y", "%d/%m/%Y"],
+}
+_ISO_FRACTION = re.compile(r"\.(\d+)")
+_ISO_COMPACT_OFFSET = re.compile(r"([+-]\d{2})(\d{2})$")
+
+
+def _strptime_first(kind: str, raw: str) -> Optional[datetime]:
+    for date_format in _STRPTIME_FORMATS[kind]:
+        try:
+            return datetime.strptime(raw, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def _normalize_iso(raw: str) -> str:
+    """
+    Rewrite an ISO 8601 match into the subset datetime.fromisoformat accepts on Python 3.9/3.10:
+    "Z" becomes "+00:00", "+0000" becomes "+00:00" and fractions are padded/truncated to 6 digits
+    """
+    if raw.endswith("Z"):
+        raw = raw[:-1] + "+00:00"
+    raw = _ISO_COMPACT_OFFSET.sub(r"\1:\2", raw)
+    return _ISO_FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), raw)
+
+
+def _parse_timestamp_match(match: "re.Match") -> Optional[Tuple[str, datetime]]:
+    kind = match.lastgroup if match.lastgroup != "apache_tz" else "apache"
+    raw = " ".join(match.group(kind).split())
+    try:
+        if kind in ("iso", "date"):
+            dt = datetime.fromisoformat(_normalize_iso(raw))
+        elif kind == "apache":
+            dt = _strptime_first(kind, f"{raw} {match.group('apache_tz')}")
+        elif kind == "syslog":
+            # Syslog doesn't have year, use current year
+            dt = _strptime_first(kind, f"{raw} {datetime.now().year}")
+        else:
+            dt = _strptime_first(kind, raw)
+    except ValueError:
+        return None
+    if dt is None:
+        return None
+    # Naive timestamps are treated as UTC
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return kind, dt
+
+
+def scan_timestamps(text: str) -> List[Tuple[str, datetime]]:
+    """Every parseable timestamp in text, in order of appearance, as (kind, naive UTC datetime)"""
+    found = []
+    for match in _TIMESTAMP_RE.finditer(text):
+        parsed = _parse_timestamp_match(match)
+        if parsed:
+            found.append(parsed)
+    return found
+
+
+def _epoch_millis(dt: datetime) -> int:
+    return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def extract_timestamp_range(text: str) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """
+    Scan text once and return (timestamp, start_ms, end_ms):
+    the representative ISO 8601 timestamp (most specific format present, first occurrence) and
+    the earliest/latest timestamps found as epoch milliseconds.
+    """
+    found = scan_timestamps(text)
+    if not found:
+        return None, None, None
+    
+    representative = None
+    for kind in _TIMESTAMP_PREFERENCE:
+        representative = next((dt for found_kind, dt in found if found_kind == kind), None)
+        if representative is not None:
+            break
+    
+    instants = [dt for _kind, dt in found]
+    return (
+        representative.replace(microsecond=0).isoformat() + 'Z',
+        _epoch_millis(min(instants)),
+        _epoch_millis(max(instants)),
+    )
+
 
 def extract_timestamp(text: str) -> str:
     """Extract timestamp from text using multiple patterns"""
-    # Define timestamp patterns in order of preference (most specific first)
-    patterns = [
-        # ISO 8601: 2024-02-15T14:30:00Z or 2024-02-15T14:30:00+00:00
-        (r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?', '%Y-%m-%dT%H:%M:%S'),
-        # Common log format: 2024-02-15 14:30:00
-        (r'\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}', '%Y-%m-%d %H:%M:%S'),
-        # Date with time: 02/15/2024 14:30:00 or 15/02/2024 14:30:00
-        (r'\d{1,2}/\d{1,2}/\d{4}\s+\d{2}:\d{2}:\d{2}', '%m/%d/%Y %H:%M:%S'),
-        # Apache/Nginx log: [15/Feb/2024:14:30:00 +0000]
-        (r'\[(\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2})\s+[+-]\d{4}\]', '%d/%b/%Y:%H:%M:%S'),
-        # Syslog format: Feb 15 14:30:00
-        (r'\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}', '%b %d %H:%M:%S'),
-        # Date only: 2024-02-15
-        (r'\d{4}-\d{2}-\d{2}', '%Y-%m-%d'),
-        # US format: 02/15/2024
-        (r'\d{1,2}/\d{1,2}/\d{4}', '%m/%d/%Y'),
-    ]
-    
-    for pattern, date_format in patterns:
-        match = re.search(pattern, text)
-        if match:
-            timestamp_str = match.group(1) if match.groups() else match.group(0)
-            try:
-                # Parse and convert to ISO 8601
-                if 'T' in timestamp_str or 'Z' in timestamp_str or '+' in timestamp_str:
-                    # Already ISO-ish format, clean it up
-                    timestamp_str = timestamp_str.replace('Z', '+00:00')
-                    try:
-                        dt = datetime.fromisoformat(timestamp_str)
-                        return dt.isoformat() + 'Z'
-                    except:
-                        # Try with just the date/time part
-                        timestamp_str = re.sub(r'[+-]\d{2}:\d{2}$', '', timestamp_str)
-                        dt = datetime.fromisoformat(timestamp_str)
-                        return dt.isoformat() + 'Z'
-                else:
-                    # Parse with format and convert
-                    if '%b' in date_format and '%Y' not in timestamp_str:
-                        # Syslog doesn't have year, use current year
-                        current_year = datetime.now().year
-                        timestamp_str = f"{timestamp_str} {current_year}"
-                        date_format = f"{date_format} %Y"
-                    
-                    dt = datetime.strptime(timestamp_str, date_format)
-                    return dt.isoformat() + 'Z'
-            except Exception as e:
-                # If parsing fails, continue to next pattern
+    return extract_timestamp_range(text)[0]
+
+_TOKEN_RE = re.compile(r"\S+")
+
+def _iter_token_offsets(segments: Iterable[str]) -> Iterator[Tuple[str, int]]:
+    """
+    Whitespace tokens with their character offset in the concatenated segments.
+    A token split across a segment boundary is rejoined and keeps its first offset.
+    """
+    carry = ""
+    carry_offset = 0
+    base = 0
+    for segment in segments:
+        if not segment:
+            continue
+        if carry and segment[0].isspace():
+            yield carry, carry_offset
+            carry = ""
+        for match in _TOKEN_RE.finditer(segment):
+            token = match.group()
+            offset = base + match.start()
+            if carry:
+                # Only the first match can continue the carried token (segment starts with non-space)
+                token = carry + token
+                offset = carry_offset
+                carry = ""
+            if match.end() == len(segment):
+                carry = token
+                carry_offset = offset
                 continue
+            yield token, offset
+        base += len(segment)
+    if carry:
+        yield carry, carry_offset
+
+def iter_tokens(segments: Iterable[str]) -> Iterator[str]:
+    """Whitespace tokens across text segments; a token split between two segments is rejoined"""
+    for token, _offset in _iter_token_offsets(segments):
+        yield token
+
+def count_chunks(total_tokens: int) -> int:
+    """Number of chunks chunk_text/chunk_segments produce for a given token count"""
+    if total_tokens <= 0:
+        return 0
+    step = settings.MAX_CHUNK_TOKENS - settings.CHUNK_OVERLAP
+    return (total_tokens + step - 1) // step
+
+def _page_locator(pages: Optional[Dict[Any, str]]) -> Optional[Callable[[int], Any]]:
+    """
+    Map a character offset in the parsed text to its page number.
+    parse_pdf joins pages with a trailing newline each, so page i spans len(text_i) + 1 characters.
+    """
+    if not pages:
+        return None
+    page_numbers = list(pages.keys())
+    boundaries = []
+    cumulative = 0
+    for page_text in pages.values():
+        cumulative += len(page_text) + 1
+        boundaries.append(cumulative)
     
-    return None
+    def locate(offset: int):
+        idx = bisect_right(boundaries, offset)
+        return page_numbers[idx] if idx < len(page_numbers) else None
+    
+    return locate
+
+def chunk_segments(segments: Iterable[str], evidence_id: str, metadata: dict = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily chunk text supplied as an iterable of segments (one string, or blocks streamed from disk).
+    Runs in linear time and holds at most one window of tokens; page numbers come from the
+    chunk's starting character offset when metadata carries PDF pages.
+    """
+    if metadata is None:
+        metadata = {}
+    
+    chunk_size = settings.MAX_CHUNK_TOKENS
+    step = chunk_size - settings.CHUNK_OVERLAP
+    locate_page = _page_locator(metadata.get("pages"))
+    chunk_index = 0
+    window: List[Tuple[str, int]] = []
+    
+    def make_chunk(chunk_tokens: List[Tuple[str, int]]) -> Dict[str, Any]:
+        chunk_text_str = " ".join(token for token, _offset in chunk_tokens)
+        # Extract timestamps from chunk text: representative value plus the covered time range
+        timestamp, timestamp_start, timestamp_end = extract_timestamp_range(chunk_text_str)
+        return {
+            "chunk_index": chunk_index,
+            "text": chunk_text_str,
+            "timestamp": timestamp,
+            "timestamp_start": timestamp_start,
+            "timestamp_end": timestamp_end,
+            "evidence_id": evidence_id,
+            "filename": metadata.get("filename", ""),
+            "file_type": metadata.get("file_type", ""),
+            "page_number": locate_page(chunk_tokens[0][1]) if locate_page else None,
+            "total_pages": metadata.get("total_pages"),
+        }
+    
+    for token_offset in _iter_token_offsets(segments):
+        window.append(token_offset)
+        if len(window) == chunk_size:
+            yield make_chunk(window)
+            chunk_index += 1
+            del window[:step]
+    
+    # Tail: a chunk starts at every step offset below the token count
+    while window:
+        yield make_chunk(window[:chunk_size])
+        chunk_index += 1
+        del window[:step]
 
-def chunk_text(text: str, evidence_id: str, metadata: dict = None) -> List[Dict[str, Any]]:
+def chunk_text(text: str, evidence_id: str, metadata: dict = None) -> Iterator[Dict[str, Any]]:
     """
-    Chunk text with enriched metadata.
+    Chunk text with enriched metadata, yielding chunks lazily.
     
     Args:
         text: The raw text to chunk
         evidence_id: ID of the evidence 
         metadata: Optional dict with keys like filename, file_type, pages, total_pages
     """
+    return chunk_segments([text], evidence_id, metadata=metadata)
+
+
+# Log lines whose first token is a timestamp: ISO/date, US date, syslog, or a bracketed/bare time of day
+_LOG_LINE_START_RE = re.compile(
+    r"\s*\[?(?:\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4}|\d{2}/\w{3}/\d{4}:|\d{2}:\d{2}:\d{2}"
+    r"|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})"
+)
+LOG_FILE_TYPES = {"log"}
+LOG_SNIFF_LINES = 200
+LOG_SNIFF_MIN_RATIO = 0.6
+
+def looks_like_log(sample: str) -> bool:
+    """True when most of the sample's non-blank lines start with a timestamp"""
+    lines = [line for line in sample.splitlines()[:LOG_SNIFF_LINES] if line.strip()]
+    if len(lines) < 2:
+        return False
+    stamped = sum(1 for line in lines if _LOG_LINE_START_RE.match(line))
+    return stamped / len(lines) >= LOG_SNIFF_MIN_RATIO
+
+def select_chunk_mode(file_type: str, make_segments: Callable[[], Iterable[str]]) -> str:
+    """
+    Pick "lines" (whole log records) or "tokens" (fixed token windows) per LOG_CHUNKING_MODE.
+    In auto mode .log files always chunk by lines; .txt files do when the first 64 KiB look like a log.
+    """
+    mode = settings.LOG_CHUNKING_MODE
+    if mode in ("lines", "tokens"):
+        return mode
+    if file_type in LOG_FILE_TYPES:
+        return "lines"
+    if file_type != "txt":
+        return "tokens"
+    sample = []
+    size = 0
+    for segment in make_segments():
+        sample.append(segment)
+        size += len(segment)
+        if size >= 65536:
+            break
+    return "lines" if looks_like_log("".join(sample)) else "tokens"
+
+def _iter_line_offsets(segments: Iterable[str]) -> Iterator[Tuple[str, int]]:
+    """(line, char offset) pairs across text segments; a line split between two segments is rejoined"""
+    base = 0
+    carry = ""
+    carry_offset = 0
+    for segment in segments:
+        lines = segment.split("\n")
+        position = base
+        for index, line in enumerate(lines):
+            if index == 0 and carry:
+                line = carry + line
+                offset = carry_offset
+                carry = ""
+            else:
+                offset = position
+            position += len(lines[index]) + 1
+            if index == len(lines) - 1:
+                # The last piece of a segment may continue in the next one
+                carry, carry_offset = line, offset
+            else:
+                yield line.rstrip("\r"), offset
+        base += len(segment)
+    if carry:
+        yield carry.rstrip("\r"), carry_offset
+
+def _iter_log_records(segments: Iterable[str]) -> Iterator[Tuple[str, int, int]]:
+    """
+    Group lines into records as (text, char offset, token count).
+    Blank lines are dropped; indented lines (stack traces, wrapped messages) continue the previous record.
+    """
+    record: List[str] = []
+    record_offset = 0
+    for line, offset in _iter_line_offsets(segments):
+        if not line.strip():
+            continue
+        if record and line[:1].isspace():
+            record.append(line)
+            continue
+        if record:
+            text = "\n".join(record)
+            yield text, record_offset, len(text.split())
+        record = [line]
+        record_offset = offset
+    if record:
+        text = "\n".join(record)
+        yield text, record_offset, len(text.split())
+
+def _pack_log_records(segments: Iterable[str]) -> Iterator[List[Tuple[str, int]]]:
+    """
+    Pack whole records into groups of at most MAX_CHUNK_TOKENS tokens.
+    A record over the budget on its own is cut into token windows, one group each.
+    """
+    chunk_size = settings.MAX_CHUNK_TOKENS
+    group: List[Tuple[str, int]] = []
+    group_tokens = 0
+    for text, offset, tokens in _iter_log_records(segments):
+        if tokens > chunk_size:
+            if group:
+                yield group
+                group, group_tokens = [], 0
+            words = text.split()
+            for start in range(0, len(words), chunk_size):
+                yield [(" ".join(words[start:start + chunk_size]), offset)]
+            continue
+        if group and group_tokens + tokens > chunk_size:
+            yield group
+            group, group_tokens = [], 0
+        group.append((text, offset))
+        group_tokens += tokens
+    if group:
+        yield group
+
+def count_log_chunks(segments: Iterable[str]) -> int:
+    """Number of chunks chunk_log_segments produces for the same segments"""
+    return sum(1 for _ in _pack_log_records(segments))
+
+def chunk_log_segments(segments: Iterable[str], evidence_id: str, metadata: dict = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily chunk log text on record boundaries instead of fixed token windows.
+    Records keep their line breaks and never straddle two chunks, and each chunk carries
+    "line_offsets": the character offset of every record within the chunk text, so
+    consumers can slice events without re-splitting. Records are not repeated as overlap.
+    """
     if metadata is None:
         metadata = {}
     
-    tokens = text.split()  # Simple whitespace tokenization for speed/simplicity
-    chunk_size = settings.MAX_CHUNK_TOKENS
-    overlap = settings.CHUNK_OVERLAP
-    
-    chunks = []
-    start = 0
-    total_tokens = len(tokens)
-    
-    chunk_index = 0
+    locate_page = _page_locator(metadata.get("pages"))
+    for chunk_index, group in enumerate(_pack_log_records(segments)):
+        line_offsets = []
+        position = 0
+        for text, _offset in group:
+            line_offsets.append(position)
+            position += len(text) + 1
+        chunk_text_str = "\n".join(text for text, _offset in group)
+        timestamp, timestamp_start, timestamp_end = extract_timestamp_range(chunk_text_str)
+        yield {
+            "chunk_index": chunk_index,
+            "text": chunk_text_str,
+            "timestamp": timestamp,
+            "timestamp_start": timestamp_start,
+            "timestamp_end": timestamp_end,
+            "line_offsets": line_offsets,
+            "evidence_id": evidence_id,
+            "filename": metadata.get("filename", ""),
+            "file_type": metadata.get("file_type", ""),
+            "page_number": locate_page(group[0][1]) if locate_page else None,
+            "total_pages": metadata.get("total_pages"),
+        }
+
+
+def _pack_records(records: Iterable[Tuple[int, str]], header_tokens: int, max_records: int) -> Iterator[List[Tuple[int, str]]]:
+    """
+    Group (record number, text) pairs into at most max_records records per chunk, also stopping
+    before the header plus records would pass MAX_CHUNK_TOKENS. A record over the budget is kept whole.
+    With a header but no records (a header-only CSV) a single empty group is yielded, so the
+    evidence still gets one chunk carrying its header.
+    """
+    budget = settings.MAX_CHUNK_TOKENS
+    group: List[Tuple[int, str]] = []
+    group_tokens = header_tokens
+    packed = False
+    for number, text in records:
+        tokens = len(text.split())
+        if group and (len(group) >= max_records or group_tokens + tokens > budget):
+            packed = True
+            yield group
+            group, group_tokens = [], header_tokens
+        group.append((number, text))
+        group_tokens += tokens
+    if group or (header_tokens and not packed):
+        yield group
+
+def count_record_chunks(records: Iterable[Tuple[int, str]], header: str = "", max_records: int = None) -> int:
+    """Number of chunks chunk_records produces for the same records"""
+    max_records = max(1, max_records or settings.CSV_CHUNK_ROWS)
+    return sum(1 for _ in _pack_records(records, len(header.split()), max_records))
+
+def chunk_records(
+    records: Iterable[Tuple[int, str]],
+    evidence_id: str,
+    metadata: dict = None,
+    header: str = "",
+    max_records: int = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily chunk structured evidence supplied as (record number, text) pairs, e.g. CSV rows or
+    flattened JSON records.
+    Each chunk repeats the header, holds whole records only and carries the covered
+    record_start/record_end numbers plus line_offsets of every record within the chunk text.
+    A header with no records yields one header-only chunk covering record range 0-0.
+    """
+    if metadata is None:
+        metadata = {}
     
-    while start < total_tokens:
-        end = min(start + chunk_size, total_tokens)
-        chunk_tokens = tokens[start:end]
-        chunk_text_str = " ".join(chunk_tokens)
-        
-        # Extract timestamp from chunk text
-        timestamp = extract_timestamp(chunk_text_str)
-        
-        # Determine page number for PDF chunks
-        page_number = None
-        if metadata.get("pages"):
-            # Estimate which page this chunk came from based on character position
-            char_position = len(" ".join(tokens[:start]))
-            cumulative = 0
-            for pg_num, pg_text in metadata["pages"].items():
-                cumulative += len(pg_text)
-                if char_position < cumulative:
-                    page_number = pg_num
-                    break
-
-        chunks.append({
+    max_records = max(1, max_records or settings.CSV_CHUNK_ROWS)
+    prefix = f"{header}\n" if header else ""
+    for chunk_index, group in enumerate(_pack_records(records, len(header.split()), max_records)):
+        line_offsets = []
+        position = len(prefix)
+        for _number, text in group:
+            line_offsets.append(position)
+            position += len(text) + 1
+        chunk_text_str = prefix + "\n".join(text for _number, text in group) if group else header
+        timestamp, timestamp_start, timestamp_end = extract_timestamp_range(chunk_text_str)
+        yield {
             "chunk_index": chunk_index,
             "text": chunk_text_str,
             "timestamp": timestamp,
+            "timestamp_start": timestamp_start,
+            "timestamp_end": timestamp_end,
+            "line_offsets": line_offsets,
+            "record_start": group[0][0] if group else 0,
+            "record_end": group[-1][0] if group else 0,
             "evidence_id": evidence_id,
             "filename": metadata.get("filename", ""),
             "file_type": metadata.get("file_type", ""),
-            "page_number": page_number,
+            "page_number": None,
             "total_pages": metadata.get("total_pages"),
-        })
-        
-        chunk_index += 1
-        start += (chunk_size - overlap)
-        
-    return chunks
+        }
@@ -0,0 +1,348 @@
+import json
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from neo4j import Session
+from app.core.config import settings
+from app.db.neo4j import neo4j_handler
+from app.core.metrics import INGESTION_JOBS_RUNNING, INGESTION_QUEUE_DEPTH
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+ACTIVE_JOB_STATUSES = [JOB_QUEUED, JOB_RUNNING]
+
+# Identifies this process's worker pool on the jobs it owns; other processes and replicas
+# leave a job alone while its owner keeps renewing the lease
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_heartbeat_stop = threading.Event()
+_heartbeat_thread: Optional[threading.Thread] = None
+
+
+def get_ingestion_executor() -> ThreadPoolExecutor:
+    """In-process worker pool that runs ingestion jobs off the request thread"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.INGESTION_WORKERS),
+                thread_name_prefix="ingestion",
+            )
+        return _executor
+
+
+def submit_job(executor: Executor, kind: str, fn: Callable, *args) -> Future:
+    """Submit a job function, keeping the queue-depth and running gauges for its kind up to date"""
+    INGESTION_QUEUE_DEPTH.inc(kind=kind)
+    
+    def run():
+        INGESTION_QUEUE_DEPTH.dec(kind=kind)
+        INGESTION_JOBS_RUNNING.inc(kind=kind)
+        try:
+            return fn(*args)
+        finally:
+            INGESTION_JOBS_RUNNING.dec(kind=kind)
+    
+    return executor.submit(run)
+
+
+def shutdown_ingestion_executor(wait: bool = True):
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+def _lease_ms() -> int:
+    return max(1, settings.INGESTION_JOB_LEASE_SECONDS) * 1000
+
+
+def _heartbeat_loop():
+    interval = max(1.0, settings.INGESTION_JOB_LEASE_SECONDS / 3)
+    while not _heartbeat_stop.wait(interval):
+        try:
+            session = neo4j_handler.get_session()
+            try:
+                jobs = IngestionJobStore(session)
+                jobs.renew_leases()
+                expired = jobs.fail_expired_jobs()
+            finally:
+                session.close()
+            if expired:
+                print(f"Marked {expired} ingestion job(s) with an expired lease as failed.")
+        except Exception as e:
+            print(f"ERROR renewing ingestion job leases: {e}")
+
+
+def start_job_heartbeat():
+    """Renew this worker's job leases every INGESTION_JOB_LEASE_SECONDS / 3 and fail jobs whose owner stopped renewing"""
+    global _heartbeat_thread
+    with _executor_lock:
+        if _heartbeat_thread is not None:
+            return
+        _heartbeat_stop.clear()
+        _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="ingestion-heartbeat", daemon=True)
+        _heartbeat_thread.start()
+
+
+def stop_job_heartbeat():
+    global _heartbeat_thread
+    with _executor_lock:
+        _heartbeat_stop.set()
+        _heartbeat_thread = None
+
+
+class IngestionJobStore:
+    """Persists ingestion job records as (:Case)-[:HAS_JOB]->(:IngestionJob) nodes"""
+
+    JOB_FIELDS = """
+        j.job_id as job_id,
+        j.case_id as case_id,
+        j.evidence_id as evidence_id,
+        j.filename as filename,
+        j.file_type as file_type,
+        j.status as status,
+        j.processed_chunks as processed_chunks,
+        j.total_chunks as total_chunks,
+        j.error as error,
+        j.result as result,
+        j.spool_path as spool_path,
+        j.resumed_from as resumed_from,
+        j.parent_job_id as parent_job_id,
+        j.created_at as created_at,
+        j.started_at as started_at,
+        j.finished_at as finished_at
+    """
+
+    def __init__(self, session: Session, user_id: str = None):
+        self.session = session
+        self.user_id = user_id
+
+    def _to_dict(self, record) -> Dict[str, Any]:
+        data = dict(record)
+        raw_result = data.get("result")
+        if isinstance(raw_result, str) and raw_result:
+            try:
+                data["result"] = json.loads(raw_result)
+            except json.JSONDecodeError:
+                data["result"] = None
+        data["processed_chunks"] = data.get("processed_chunks") or 0
+        data["total_chunks"] = data.get("total_chunks") or 0
+        return data
+
+    def create_job(
+        self,
+        job_id: str,
+        case_id: str,
+        evidence_id: str,
+        filename: str,
+        file_type: str,
+        spool_path: str = None,
+        resumed_from: str = None,
+        parent_job_id: str = None,
+    ) -> Optional[Dict[str, Any]]:
+        # Archive members are ordinary jobs that also hang off their archive job
+        query = f"""
+        MATCH (c:Case {{case_id: $case_id}})
+        OPTIONAL MATCH (parent:IngestionJob {{job_id: $parent_job_id}})
+        CREATE (j:IngestionJob {{
+            job_id: $job_id,
+            case_id: $case_id,
+            user_id: $user_id,
+            evidence_id: $evidence_id,
+            filename: $filename,
+            file_type: $file_type,
+            spool_path: $spool_path,
+            resumed_from: $resumed_from,
+            parent_job_id: $parent_job_id,
+            status: $status,
+            processed_chunks: 0,
+            total_chunks: 0,
+            worker_id: $worker_id,
+            lease_expires_at: timestamp() + $lease_ms,
+            created_at: timestamp()
+        }})
+        CREATE (c)-[:HAS_JOB]->(j)
+        FOREACH (_ IN CASE WHEN parent IS NULL THEN [] ELSE [1] END | CREATE (parent)-[:HAS_MEMBER]->(j))
+        RETURN {self.JOB_FIELDS}
+        """
+        record = self.session.run(
+            query,
+            job_id=job_id,
+            case_id=case_id,
+            user_id=self.user_id,
+            evidence_id=evidence_id,
+            filename=filename,
+            file_type=file_type,
+            spool_path=spool_path,
+            resumed_from=resumed_from,
+            parent_job_id=parent_job_id,
+            status=JOB_QUEUED,
+            worker_id=WORKER_ID,
+            lease_ms=_lease_ms(),
+        ).single()
+        return self._to_dict(record) if record else None
+
+    def mark_running(self, job_id: str):
+        self.session.run(
+            """
+            MATCH (j:IngestionJob {job_id: $job_id})
+            SET j.status = $status,
+                j.started_at = timestamp(),
+                j.worker_id = $worker_id,
+                j.lease_expires_at = timestamp() + $lease_ms
+            """,
+            job_id=job_id,
+            status=JOB_RUNNING,
+            worker_id=WORKER_ID,
+            lease_ms=_lease_ms(),
+        ).consume()
+
+    def update_progress(self, job_id: str, processed_chunks: int, total_chunks: int):
+        self.session.run(
+            """
+            MATCH (j:IngestionJob {job_id: $job_id})
+            SET j.processed_chunks = $processed_chunks, j.total_chunks = $total_chunks
+            """,
+            job_id=job_id,
+            processed_chunks=processed_chunks,
+            total_chunks=total_chunks,
+        ).consume()
+
+    def mark_done(self, job_id: str, result: Dict[str, Any]):
+        self.session.run(
+            """
+            MATCH (j:IngestionJob {job_id: $job_id})
+            SET j.status = $status, j.result = $result, j.finished_at = timestamp()
+            """,
+            job_id=job_id,
+            status=JOB_DONE,
+            result=json.dumps(result, default=str),
+        ).consume()
+
+    def mark_failed(self, job_id: str, error: str):
+        self.session.run(
+            """
+            MATCH (j:IngestionJob {job_id: $job_id})
+            SET j.status = $status, j.error = $error, j.finished_at = timestamp()
+            """,
+            job_id=job_id,
+            status=JOB_FAILED,
+            error=error,
+        ).consume()
+
+    def renew_leases(self) -> int:
+        """Extend the lease of every queued/running job owned by this process"""
+        record = self.session.run(
+            """
+            MATCH (j:IngestionJob {worker_id: $worker_id})
+            WHERE j.status IN $active
+            SET j.lease_expires_at = timestamp() + $lease_ms
+            RETURN count(j) as renewed
+            """,
+            worker_id=WORKER_ID,
+            active=ACTIVE_JOB_STATUSES,
+            lease_ms=_lease_ms(),
+        ).single()
+        return record["renewed"] if record else 0
+
+    def fail_expired_jobs(self) -> int:
+        """
+        Queued/running jobs whose lease has lapsed lost their worker (crash, restart, scaled-down replica).
+        Jobs of live workers, in this process or any other, keep being renewed and are left alone.
+        Their evidence is marked failed so it can be resumed from its checkpoint.
+        """
+        record = self.session.run(
+            """
+            MATCH (j:IngestionJob)
+            WHERE j.status IN $active
+              AND coalesce(j.lease_expires_at, 0) < timestamp()
+              AND coalesce(j.worker_id, '') <> $worker_id
+            SET j.status = $status,
+                j.error = 'Interrupted: the worker running this job stopped',
+                j.finished_at = timestamp()
+            WITH j
+            OPTIONAL MATCH (e:Evidence {evidence_id: j.evidence_id})
+            SET e.status = 'failed'
+            RETURN count(DISTINCT j) as interrupted
+            """,
+            active=ACTIVE_JOB_STATUSES,
+            status=JOB_FAILED,
+            worker_id=WORKER_ID,
+        ).single()
+        return record["interrupted"] if record else 0
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job; archive jobs also carry their member jobs and progress summed over them"""
+        query = f"""
+        MATCH (u:User {{id: $user_id}})-[:CREATED]->(:Case)-[:HAS_JOB]->(j:IngestionJob {{job_id: $job_id}})
+        RETURN {self.JOB_FIELDS}
+        """
+        record = self.session.run(query, user_id=self.user_id, job_id=job_id).single()
+        if not record:
+            return None
+        job = self._to_dict(record)
+        members = self.list_member_jobs(job_id)
+        if members:
+            job["members"] = members
+            job["processed_chunks"] = sum(member["processed_chunks"] for member in members)
+            job["total_chunks"] = sum(member["total_chunks"] for member in members)
+        return job
+
+    def list_member_jobs(self, job_id: str) -> List[Dict[str, Any]]:
+        query = f"""
+        MATCH (:IngestionJob {{job_id: $job_id}})-[:HAS_MEMBER]->(j:IngestionJob)
+        RETURN {self.JOB_FIELDS}
+        ORDER BY j.created_at ASC
+        """
+        return [self._to_dict(record) for record in self.session.run(query, job_id=job_id)]
+
+    def latest_job_for_evidence(self, evidence_id: str) -> Optional[Dict[str, Any]]:
+        query = f"""
+        MATCH (u:User {{id: $user_id}})-[:CREATED]->(:Case)-[:HAS_JOB]->(j:IngestionJob {{evidence_id: $evidence_id}})
+        RETURN {self.JOB_FIELDS}
+        ORDER BY j.created_at DESC
+        LIMIT 1
+        """
+        record = self.session.run(query, user_id=self.user_id, evidence_id=evidence_id).single()
+        return self._to_dict(record) if record else None
+
+    def spool_paths_for_evidence(self, evidence_id: str) -> List[str]:
+        results = self.session.run(
+            """
+            MATCH (j:IngestionJob {evidence_id: $evidence_id})
+            WHERE j.spool_path IS NOT NULL
+            RETURN DISTINCT j.spool_path as spool_path
+            """,
+            evidence_id=evidence_id,
+        )
+        return [record["spool_path"] for record in results]
+
+    def clear_spool_path(self, evidence_id: str):
+        """The spooled upload is gone once evidence is indexed; forget it on every job of the evidence"""
+        self.session.run(
+            """
+            MATCH (j:IngestionJob {evidence_id: $evidence_id})
+            REMOVE j.spool_path
+            """,
+            evidence_id=evidence_id,
+        ).consume()
+
+    def list_jobs(self, case_id: str) -> List[Dict[str, Any]]:
+        query = f"""
+        MATCH (u:User {{id: $user_id}})-[:CREATED]->(:Case {{case_id: $case_id}})-[:HAS_JOB]->(j:IngestionJob)
+        WHERE j.parent_job_id IS NULL
+        RETURN {self.JOB_FIELDS}
+        ORDER BY j.created_at DESC
+        """
+        results = self.session.run(query, user_id=self.user_id, case_id=case_id)
+        return [self._to_dict(record) for record in results]
@@ -1,75 +1,471 @@
 import json
 import csv
+import hashlib
 import io
-import pypdf
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, BinaryIO, Iterator, List, Optional, Tuple, Union
 from fastapi import UploadFile
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import pypdf
+
+# File types whose parsers can read a spooled upload back as a stream of text segments
+STREAMABLE_FILE_TYPES = {"txt", "log"}
+# JSON variants decoded incrementally into flattened records
+JSON_FILE_TYPES = {"json", "ndjson", "jsonl"}
 
 def parse_txt(content: bytes) -> str:
     return content.decode("utf-8", errors="ignore")
 
-def parse_json(content: bytes) -> str:
-    data = json.loads(content.decode("utf-8"))
-    return json.dumps(data, indent=2)
+def _markdown_row(row: list, width: int) -> str:
+    # Pad row if shorter than header
+    padded = row + [""] * (width - len(row))
+    return "| " + " | ".join(padded[:width]) + " |"
 
-def parse_csv(content: bytes) -> str:
-    """Parse CSV into structured markdown table for better LLM comprehension"""
-    decoded = content.decode("utf-8", errors="ignore")
-    io_string = io.StringIO(decoded)
-    reader = csv.reader(io_string)
-    rows = list(reader)
-    
-    if not rows:
+def iter_txt_segments(path: str, block_size: int = None) -> Iterator[str]:
+    """Read a spooled text file back in fixed-size decoded blocks"""
+    block_size = block_size or settings.UPLOAD_SPOOL_BLOCK_SIZE
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
+
+def read_csv_header(path: str) -> str:
+    """Markdown header and separator lines of a spooled CSV; repeated at the top of every row chunk"""
+    with open(path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+        header = next(csv.reader(f), None)
+    if not header:
         return ""
+    return "| " + " | ".join(header) + " |\n" + "| " + " | ".join(["---"] * len(header)) + " |"
+
+def iter_csv_rows(path: str) -> Iterator[Tuple[int, str]]:
+    """
+    Stream a spooled CSV as (row number, markdown row) pairs, one row in memory at a time.
+    Row numbers count data rows from 1 (header excluded); blank rows are skipped but still counted.
+    """
+    with open(path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        for number, row in enumerate(reader, start=1):
+            if row:
+                yield number, _markdown_row(row, len(header))
+
+def _json_scalar(value: Any) -> str:
+    # Strings are left bare unless whitespace or "=" would make the key=value pair ambiguous
+    if isinstance(value, str):
+        if value and not any(ch.isspace() or ch == "=" for ch in value):
+            return value
+        return json.dumps(value, ensure_ascii=False)
+    return json.dumps(value)
+
+def flatten_json(value: Any, prefix: str = "") -> Iterator[str]:
+    """Flatten a decoded JSON value into key=value pairs with dotted/indexed key paths"""
+    if isinstance(value, dict):
+        if not value and prefix:
+            yield f"{prefix}={{}}"
+        for key, item in value.items():
+            yield from flatten_json(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        if not value and prefix:
+            yield f"{prefix}=[]"
+        for index, item in enumerate(value):
+            yield from flatten_json(item, f"{prefix}[{index}]")
+    else:
+        yield f"{prefix}={_json_scalar(value)}" if prefix else _json_scalar(value)
+
+class _JsonStreamReader:
+    """Decode JSON values one at a time from a text file, holding one block plus the current value"""
+
+    WHITESPACE = " \t\r\n"
+
+    def __init__(self, f, block_size: int):
+        self.f = f
+        self.block_size = block_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = 0):
+        block = self.f.read(max(self.block_size, size))
+        if not block:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + block
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at end of input"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Malformed JSON: expected '{char}' at offset {self.pos}")
+        self.pos += 1
+
+    def _decode_buffered(self) -> Tuple[bool, Any]:
+        """(True, value) if the next value is complete in the buffer; (False, None) if more input is needed"""
+        try:
+            value, end = self.decoder.raw_decode(self.buf, self.pos)
+        except json.JSONDecodeError:
+            if self.eof:
+                raise
+            return False, None
+        # A value ending exactly at the buffer edge may continue (e.g. a number) in the next block
+        if end < len(self.buf) or self.eof:
+            self.pos = end
+            return True, value
+        return False, None
+
+    def decode(self) -> Any:
+        self.peek()
+        while True:
+            complete, value = self._decode_buffered()
+            if complete:
+                return value
+            # Read at least as much again as is buffered: a value spanning many blocks is then
+            # re-scanned O(log n) times rather than once per block
+            self._fill(len(self.buf) - self.pos)
+
+    def fits_in_buffer(self) -> bool:
+        """Whether the next value is complete in the current buffer (nothing is consumed)"""
+        self.peek()
+        pos = self.pos
+        try:
+            complete, _value = self._decode_buffered()
+        except json.JSONDecodeError:
+            complete = False
+        self.pos = pos
+        return complete
+
+    def iter_array(self) -> Iterator[Any]:
+        """Elements of the array at the current position, decoded one at a time"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.expect("]")
+            return
+        while True:
+            yield self.decode()
+            if self.peek() == ",":
+                self.expect(",")
+                continue
+            self.expect("]")
+            return
+
+    def iter_object_members(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Members of the object at the current position as (key path, value) records, decoded one at a
+        time; non-empty list values are split into one record per element
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.expect("}")
+            return
+        while True:
+            key = str(self.decode())
+            self.expect(":")
+            if self.peek() == "[":
+                empty = True
+                for index, item in enumerate(self.iter_array()):
+                    empty = False
+                    yield f"{key}[{index}]", item
+                if empty:
+                    yield key, []
+            else:
+                yield key, self.decode()
+            if self.peek() == ",":
+                self.expect(",")
+                continue
+            self.expect("}")
+            return
+
+def iter_json_values(path: str, block_size: int = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Incrementally decode a spooled JSON or NDJSON file as (key path, value) records.
+    A top-level array yields one record per element without loading the whole array; NDJSON and
+    other concatenated values yield one record per value. A single top-level object is split per key,
+    with list-valued keys split per element. An object larger than one block is streamed member by
+    member, but only when it is the sole top-level value: that is checked with a skimming pass first,
+    so an NDJSON file whose first line exceeds one block still yields one record per line.
+    """
+    block_size = block_size or settings.UPLOAD_SPOOL_BLOCK_SIZE
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        reader = _JsonStreamReader(f, block_size)
+        if reader.peek() == "[":
+            for item in reader.iter_array():
+                yield "", item
+            return
+        
+        if not reader.peek():
+            return
+        if reader.peek() == "{" and not reader.fits_in_buffer():
+            for _member in reader.iter_object_members():
+                pass
+            sole = not reader.peek()
+            f.seek(0)
+            reader = _JsonStreamReader(f, block_size)
+            if sole:
+                yield from reader.iter_object_members()
+                return
+        
+        first = reader.decode()
+        if reader.peek() or not isinstance(first, dict):
+            yield "", first
+            while reader.peek():
+                yield "", reader.decode()
+            return
+        
+        for key, value in first.items():
+            if isinstance(value, list) and value:
+                for index, item in enumerate(value):
+                    yield f"{key}[{index}]", item
+            else:
+                yield str(key), value
+
+def iter_json_records(path: str) -> Iterator[Tuple[int, str]]:
+    """Stream a spooled JSON/NDJSON file as (record number, flattened key=value line) pairs, numbered from 1"""
+    for number, (prefix, value) in enumerate(iter_json_values(path), start=1):
+        yield number, " ".join(flatten_json(value, prefix))
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+def _pdf_worker_count() -> int:
+    return settings.PDF_EXTRACT_WORKERS or (os.cpu_count() or 1)
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # spawn: the parent holds Neo4j/torch threads that must not be forked
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=_pdf_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_pool
+
+def shutdown_pdf_pool(wait: bool = True):
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=wait)
+            _pdf_pool = None
+
+def _open_pdf(source: Union[bytes, str]) -> "pypdf.PdfReader":
+    # source is either the raw PDF bytes or a path to a spooled upload
+    # pypdf is imported on first use (also inside pool workers) to keep app import time down
+    import pypdf
+
+    if isinstance(source, (bytes, bytearray)):
+        return pypdf.PdfReader(io.BytesIO(source))
+    return pypdf.PdfReader(source)
+
+def _extract_page_range(source: Union[bytes, str], start: int, end: int) -> List[str]:
+    """Process-pool task: extract text for pages [start, end)"""
+    reader = _open_pdf(source)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+def _extract_pages_parallel(source: Union[bytes, str], total_pages: int) -> List[str]:
+    workers = _pdf_worker_count()
+    # A few ranges per worker keeps the pool busy when some pages are much heavier than others
+    range_size = max(1, -(-total_pages // (workers * 4)))
+    ranges = [(start, min(start + range_size, total_pages)) for start in range(0, total_pages, range_size)]
+    pool = _get_pdf_pool()
+    futures = [pool.submit(_extract_page_range, source, start, end) for start, end in ranges]
+    texts: List[str] = []
+    for future in futures:
+        texts.extend(future.result())
+    return texts
+
+def parse_pdf(content: Union[bytes, str]) -> dict:
+    """
+    Parse PDF and return text with page numbers for metadata enrichment.
+    Accepts raw bytes or a file path; large documents are split into page ranges across a process pool.
+    """
+    reader = _open_pdf(content)
+    total_pages = len(reader.pages)
     
-    # If first row looks like headers (non-numeric), treat as header
-    header = rows[0]
-    data_rows = rows[1:] if len(rows) > 1 else []
-    
-    # Build markdown table
-    lines = []
-    lines.append("| " + " | ".join(header) + " |")
-    lines.append("| " + " | ".join(["---"] * len(header)) + " |")
-    for row in data_rows:
-        # Pad row if shorter than header
-        padded = row + [""] * (len(header) - len(row))
-        lines.append("| " + " | ".join(padded[:len(header)]) + " |")
+    texts = None
+    if _pdf_worker_count() > 1 and total_pages >= settings.PDF_PARALLEL_MIN_PAGES:
+        try:
+            texts = _extract_pages_parallel(content, total_pages)
+            print(f"Extracted {total_pages} PDF pages across {_pdf_worker_count()} worker processes")
+        except Exception as e:
+            print(f"WARNING: Parallel PDF extraction failed, falling back to serial: {e}")
+            # A broken pool cannot be reused; the next large PDF gets a fresh one
+            shutdown_pdf_pool(wait=False)
+            texts = None
+    if texts is None:
+        texts = [page.extract_text() or "" for page in reader.pages]
     
-    return "\n".join(lines)
-
-def parse_pdf(content: bytes) -> dict:
-    """Parse PDF and return text with page numbers for metadata enrichment"""
-    reader = pypdf.PdfReader(io.BytesIO(content))
     pages = {}
     full_text = ""
-    for i, page in enumerate(reader.pages):
-        page_text = page.extract_text() or ""
+    for i, page_text in enumerate(texts):
         pages[i + 1] = page_text
         full_text += page_text + "\n"
-    return {"text": full_text, "pages": pages, "total_pages": len(reader.pages)}
+    return {"text": full_text, "pages": pages, "total_pages": total_pages}
+
+_ocr_pool: Optional[ThreadPoolExecutor] = None
+_ocr_pool_lock = threading.Lock()
+_tesseract_version: Optional[str] = None
+
+def _get_ocr_pool() -> ThreadPoolExecutor:
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            # Tesseract runs as a subprocess per call, so threads are enough to run several at once;
+            # the pool size caps concurrent Tesseract processes across all ingestion jobs
+            _ocr_pool = ThreadPoolExecutor(
+                max_workers=settings.OCR_WORKERS or (os.cpu_count() or 1),
+                thread_name_prefix="ocr",
+            )
+        return _ocr_pool
 
-def parse_image(content: bytes, filename: str) -> str:
-    """Extract text from images using OCR (pytesseract)"""
+def shutdown_ocr_pool(wait: bool = True):
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=wait)
+            _ocr_pool = None
+
+def _ocr_cache_key(image_hash: str) -> str:
+    """Cache key: image content plus everything that changes Tesseract's output"""
+    global _tesseract_version
+    if _tesseract_version is None:
+        try:
+            import pytesseract
+            _tesseract_version = str(pytesseract.get_tesseract_version())
+        except Exception:
+            _tesseract_version = "unknown"
+    config = json.dumps(
+        {
+            "image": image_hash,
+            "tesseract": _tesseract_version,
+            "lang": settings.OCR_LANG,
+            "config": settings.OCR_TESSERACT_CONFIG,
+            "max_dimension": settings.OCR_MAX_DIMENSION,
+            "preprocess": settings.OCR_PREPROCESS,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+def _ocr_cache_path(cache_key: str) -> Optional[str]:
+    if not settings.OCR_CACHE_ENABLED:
+        return None
+    cache_dir = settings.OCR_CACHE_DIR or os.path.join(tempfile.gettempdir(), "nexustrace-ocr-cache")
+    return os.path.join(cache_dir, cache_key[:2], f"{cache_key}.txt")
+
+def _read_ocr_cache(path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
     try:
-        from PIL import Image
-        import pytesseract
-        
-        img = Image.open(io.BytesIO(content))
-        text = pytesseract.image_to_string(img)
-        
-        if text.strip():
-            return f"[OCR extracted from image: {filename}]\n\n{text.strip()}"
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _write_ocr_cache(path: Optional[str], text: str):
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"WARNING: could not write OCR cache entry {path}: {e}")
+
+def _prepare_ocr_frame(img):
+    """Optional downscale and preprocessing before OCR, per OCR_MAX_DIMENSION / OCR_PREPROCESS"""
+    from PIL import ImageOps
+    
+    max_dimension = settings.OCR_MAX_DIMENSION
+    if max_dimension and max(img.size) > max_dimension:
+        img = img.copy()
+        img.thumbnail((max_dimension, max_dimension))
+    if settings.OCR_PREPROCESS in ("grayscale", "threshold"):
+        img = ImageOps.autocontrast(img.convert("L"))
+    if settings.OCR_PREPROCESS == "threshold":
+        img = img.point(lambda value: 255 if value > 128 else 0)
+    return img
+
+def _ocr_frame(img) -> str:
+    """OCR-pool task: run Tesseract on one image frame"""
+    import pytesseract
+    
+    return pytesseract.image_to_string(
+        _prepare_ocr_frame(img),
+        lang=settings.OCR_LANG,
+        config=settings.OCR_TESSERACT_CONFIG,
+    )
+
+def ocr_image(content: bytes) -> dict:
+    """
+    OCR an image, serving repeated images from the on-disk cache.
+    Frames of multi-page images (TIFF, animated GIF) are recognised in parallel on the OCR pool.
+    Returns text, image size/mode, frame count and whether the cache answered.
+    """
+    from PIL import Image, ImageSequence
+    
+    img = Image.open(io.BytesIO(content))
+    result = {"size": img.size, "mode": img.mode, "frames": getattr(img, "n_frames", 1), "cache_hit": False}
+    
+    cache_path = _ocr_cache_path(_ocr_cache_key(hashlib.sha256(content).hexdigest()))
+    cached = _read_ocr_cache(cache_path)
+    if cached is not None:
+        result["text"] = cached
+        result["cache_hit"] = True
+        return result
+    
+    # ImageSequence reuses one image object, so hand each worker its own copy of the frame
+    frames = [frame.copy() for frame in ImageSequence.Iterator(img)]
+    pool = _get_ocr_pool()
+    futures = [pool.submit(_ocr_frame, frame) for frame in frames]
+    text = "\n\n".join(part.strip() for part in (future.result() for future in futures) if part.strip())
+    _write_ocr_cache(cache_path, text)
+    result["text"] = text
+    return result
+
+def parse_image_content(content: bytes, filename: str) -> dict:
+    """Extract text from images using OCR (pytesseract); returns text plus OCR stats"""
+    try:
+        ocr = ocr_image(content)
+        stats = {"cache_hit": ocr["cache_hit"], "frames": ocr["frames"]}
+        if ocr["text"].strip():
+            return {"text": f"[OCR extracted from image: {filename}]\n\n{ocr['text'].strip()}", "ocr": stats}
         else:
-            return f"[Image file: {filename} — OCR could not extract readable text. Image size: {img.size}, Mode: {img.mode}]"
+            return {
+                "text": f"[Image file: {filename} — OCR could not extract readable text. Image size: {ocr['size']}, Mode: {ocr['mode']}]",
+                "ocr": stats,
+            }
     except ImportError:
         # pytesseract or Pillow not installed — graceful fallback
         try:
             from PIL import Image
             img = Image.open(io.BytesIO(content))
-            return f"[Image file: {filename} — OCR not available (install pytesseract). Image size: {img.size}, Mode: {img.mode}]"
+            return {"text": f"[Image file: {filename} — OCR not available (install pytesseract). Image size: {img.size}, Mode: {img.mode}]"}
         except Exception:
-            return f"[Image file: {filename} — Could not process image]"
+            return {"text": f"[Image file: {filename} — Could not process image]"}
     except Exception as e:
-        return f"[Image file: {filename} — OCR error: {str(e)}]"
+        return {"text": f"[Image file: {filename} — OCR error: {str(e)}]"}
 
 def parse_docx(content: bytes) -> str:
     """Parse DOCX files"""
@@ -83,29 +479,18 @@ def parse_docx(content: bytes) -> str:
     except Exception as e:
         return f"[DOCX parsing error: {str(e)}]"
 
-async def parse_file(file: UploadFile, file_type: str) -> dict:
+def parse_content(content: bytes, file_type: str, filename: str) -> dict:
     """
-    Parse file and return either a string or a dict with text + metadata.
-    Returns dict with keys: text, pages (optional), total_pages (optional), file_type
+    Parse raw bytes of the in-memory file types (pdf, images, docx) and return a dict with text + metadata.
+    Returns dict with keys: text, pages (optional), total_pages (optional), file_type.
+    Text, CSV and JSON evidence is streamed from the spool by parse_path instead.
     """
-    content = await file.read()
-    filename = file.filename or "unknown"
-    
     result = {"file_type": file_type, "filename": filename}
     
-    if file_type == "txt":
-        result["text"] = parse_txt(content)
-    elif file_type == "json":
-        result["text"] = parse_json(content)
-    elif file_type == "csv":
-        result["text"] = parse_csv(content)
-    elif file_type == "pdf":
-        pdf_data = parse_pdf(content)
-        result["text"] = pdf_data["text"]
-        result["pages"] = pdf_data["pages"]
-        result["total_pages"] = pdf_data["total_pages"]
+    if file_type == "pdf":
+        result.update(parse_pdf(content))
     elif file_type in ["png", "jpg", "jpeg", "gif", "bmp", "tiff", "webp"]:
-        result["text"] = parse_image(content, filename)
+        result.update(parse_image_content(content, filename))
     elif file_type == "docx":
         result["text"] = parse_docx(content)
     else:
@@ -113,3 +498,94 @@ async def parse_file(file: UploadFile, file_type: str) -> dict:
         result["text"] = parse_txt(content)
     
     return result
+
+async def spool_upload(file: UploadFile, block_size: int = None) -> Tuple[str, str]:
+    """
+    Copy an upload to a temp file in fixed-size blocks.
+    Returns the spool path and the SHA-256 hex digest of the content, hashed while copying.
+    """
+    block_size = block_size or settings.UPLOAD_SPOOL_BLOCK_SIZE
+    spool_dir = settings.UPLOAD_SPOOL_DIR or None
+    fd, path = tempfile.mkstemp(prefix="nexustrace-upload-", dir=spool_dir)
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = await file.read(block_size)
+                if not block:
+                    break
+                digest.update(block)
+                out.write(block)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+def spool_stream(stream: BinaryIO, block_size: int = None, max_bytes: int = None) -> Tuple[str, str]:
+    """
+    Synchronous spool_upload for a binary stream, e.g. one member read out of an archive.
+    Raises ValueError (and removes the partial spool) once more than max_bytes have been read,
+    so a decompression bomb never gets further than the limit.
+    """
+    block_size = block_size or settings.UPLOAD_SPOOL_BLOCK_SIZE
+    spool_dir = settings.UPLOAD_SPOOL_DIR or None
+    fd, path = tempfile.mkstemp(prefix="nexustrace-upload-", dir=spool_dir)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = stream.read(block_size)
+                if not block:
+                    break
+                written += len(block)
+                if max_bytes is not None and written > max_bytes:
+                    raise ValueError(f"Stream exceeds {max_bytes} bytes")
+                digest.update(block)
+                out.write(block)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+def parse_path(path: str, file_type: str, filename: str) -> dict:
+    """
+    Parse a spooled upload.
+    csv returns a "records" factory of (row number, row) pairs plus the "header" to repeat per chunk;
+    json/ndjson/jsonl return a "records" factory of (record number, flattened key=value line) pairs;
+    txt/log return a "segments" factory yielding text incrementally instead of "text";
+    other types are read into memory and parsed as before.
+    """
+    if file_type == "csv":
+        return {
+            "file_type": file_type,
+            "filename": filename,
+            "header": read_csv_header(path),
+            "records": lambda: iter_csv_rows(path),
+            "max_records": settings.CSV_CHUNK_ROWS,
+        }
+
+    if file_type in JSON_FILE_TYPES:
+        return {
+            "file_type": file_type,
+            "filename": filename,
+            "records": lambda: iter_json_records(path),
+            "max_records": settings.JSON_CHUNK_RECORDS,
+        }
+
+    if file_type in STREAMABLE_FILE_TYPES:
+        return {
+            "file_type": file_type,
+            "filename": filename,
+            "segments": lambda: iter_txt_segments(path),
+        }
+
+    if file_type == "pdf":
+        # Pool workers open the spooled file themselves rather than receiving pickled bytes
+        result = {"file_type": file_type, "filename": filename}
+        result.update(parse_pdf(path))
+        return result
+
+    with open(path, "rb") as f:
+        content = f.read()
+    return parse_content(content, file_type, filename)
@@ -2,13 +2,18 @@ from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
 from typing import List
 from neo4j import Session
 from app.db.neo4j import get_db_session
+from app.ai.warmup import require_models
 from app.auth.router import get_current_user
 from app.ingestion.service import IngestionService
 from app.cases.service import CaseService
+from app.schemas.evidence import IngestionJobResponse
 
 router = APIRouter()
 
-@router.post("/upload")
+# Ingestion jobs need NER and embeddings; refuse new work until both are loaded
+ingestion_models_ready = Depends(require_models("ner", "embeddings"))
+
+@router.post("/upload", dependencies=[ingestion_models_ready])
 async def upload_evidence(
     case_id: str = Form(...),
     file: UploadFile = File(...),
@@ -22,6 +27,53 @@ async def upload_evidence(
     service = IngestionService(session, current_user["user_id"])
     return await service.process_evidence(case_id, file)
 
+@router.post("/upload-archive", dependencies=[ingestion_models_ready])
+async def upload_evidence_archive(
+    case_id: str = Form(...),
+    file: UploadFile = File(...),
+    current_user: dict = Depends(get_current_user),
+    session: Session = Depends(get_db_session)
+):
+    """Upload a .zip/.tar/.tar.gz bundle or a single gzipped file; every supported member becomes its own evidence"""
+    service = IngestionService(session, current_user["user_id"])
+    return await service.process_archive(case_id, file)
+
+@router.post("/{evidence_id}/resume", dependencies=[ingestion_models_ready])
+def resume_evidence(
+    evidence_id: str,
+    current_user: dict = Depends(get_current_user),
+    session: Session = Depends(get_db_session)
+):
+    """Continue a failed ingestion from its last committed chunk"""
+    service = IngestionService(session, current_user["user_id"])
+    if not service.get_evidence(evidence_id):
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    return service.resume_evidence(evidence_id)
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+def get_ingestion_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+    session: Session = Depends(get_db_session)
+):
+    service = IngestionService(session, current_user["user_id"])
+    job = service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
+
+@router.get("/case/{case_id}/jobs", response_model=List[IngestionJobResponse])
+def get_case_ingestion_jobs(
+    case_id: str,
+    current_user: dict = Depends(get_current_user),
+    session: Session = Depends(get_db_session)
+):
+    # Verify case ownership
+    CaseService(session, current_user["user_id"]).get_case(case_id)
+    
+    service = IngestionService(session, current_user["user_id"])
+    return service.get_jobs_for_case(case_id)
+
 @router.get("/case/{case_id}")
 def get_case_evidence(
     case_id: str,
@@ -1,91 +1,553 @@
+import hashlib
+import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from neo4j import Session
 from fastapi import UploadFile, HTTPException
+from app.core.config import settings
+from app.db.neo4j import neo4j_handler
 from app.graph.builder import GraphBuilder
-from app.ingestion.parsers import parse_file
-from app.ingestion.chunker import chunk_text
-from app.ai.nlp import extract_entities
+from app.ingestion.archives import archive_kind, iter_archive_members
+from app.core.metrics import INGESTION_CHUNKS, INGESTION_ENTITIES, INGESTION_JOBS, StageTimings
+from app.ingestion.jobs import JOB_DONE, JOB_FAILED, IngestionJobStore, get_ingestion_executor, submit_job
+from app.ingestion.parsers import parse_path, spool_stream, spool_upload
+from app.ingestion.chunker import (
+    chunk_log_segments,
+    chunk_records,
+    chunk_segments,
+    count_chunks,
+    count_log_chunks,
+    count_record_chunks,
+    iter_tokens,
+    select_chunk_mode,
+)
+from app.ai.nlp import extract_entities_batch
 from app.ai.metadata import calculate_risk_score
-from app.ai.embeddings import get_embedding
+from app.ai.embeddings import get_embeddings
+from app.rag import ann_index, vector_index
+
+# Chunk ids are uuid5(evidence id, chunk index) so a resumed run rewrites the same nodes
+CHUNK_ID_NAMESPACE = uuid.UUID("5b0f3c1e-8a4d-4e2b-9f6a-2d7c1e9b4a10")
+
+# Skipped member names listed in an archive job's result; the rest are only counted
+ARCHIVE_SKIPPED_REPORT_LIMIT = 100
+
+ALLOWED_FILE_TYPES = ["json", "ndjson", "jsonl", "csv", "txt", "log", "pdf", "png", "jpg", "jpeg", "gif", "bmp", "tiff", "webp", "docx"]
+
+
+def _merge_stage_totals(totals: Dict[str, Dict[str, Any]], stages: Dict[str, Dict[str, Any]]):
+    for name, stage in stages.items():
+        merged = totals.setdefault(name, {"rows": 0, "batches": 0, "seconds": 0.0})
+        merged["rows"] += stage["rows"]
+        merged["batches"] += stage["batches"]
+        merged["seconds"] = round(merged["seconds"] + stage["seconds"], 4)
+
+
+def chunk_id_for(evidence_id: str, chunk_index: int) -> str:
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{evidence_id}:{chunk_index}"))
+
+
+def _remove_spool(spool_path: str):
+    try:
+        os.remove(spool_path)
+    except OSError:
+        pass
+
+
+def run_ingestion_job(
+    user_id: str,
+    case_id: str,
+    job_id: str,
+    evidence_id: str,
+    filename: str,
+    file_ext: str,
+    spool_path: str,
+    content_hash: str = None,
+    resume: bool = False,
+):
+    """
+    Worker-thread entry point: owns its own Neo4j session and the spooled upload for the lifetime of the job.
+    The spool is kept when the job fails so the evidence can be resumed from its checkpoint, unless the
+    job failed before its Evidence node was created (e.g. an unreadable PDF): nothing could resume or
+    delete that evidence, so its spool is removed straight away.
+    """
+    session = neo4j_handler.get_session()
+    try:
+        jobs = IngestionJobStore(session, user_id)
+        jobs.mark_running(job_id)
+        service = IngestionService(session, user_id)
+        timings = StageTimings()
+        try:
+            with timings.stage("parse"):
+                parsed = parse_path(spool_path, file_ext, filename)
+            result = service.ingest(
+                case_id,
+                evidence_id,
+                parsed,
+                progress_callback=lambda processed, total: jobs.update_progress(job_id, processed, total),
+                content_hash=content_hash,
+                resume=resume,
+                timings=timings,
+            )
+        except Exception as e:
+            print(f"ERROR ingestion job {job_id} failed: {e}")
+            INGESTION_JOBS.inc(kind="file", status=JOB_FAILED)
+            if service.graph_builder.get_evidence_checkpoint(evidence_id) is None:
+                _remove_spool(spool_path)
+                jobs.clear_spool_path(evidence_id)
+            else:
+                service.graph_builder.set_evidence_status(evidence_id, "failed")
+            jobs.mark_failed(job_id, str(e))
+            return
+        INGESTION_JOBS.inc(kind="file", status=JOB_DONE)
+        jobs.mark_done(job_id, result)
+        _remove_spool(spool_path)
+        jobs.clear_spool_path(evidence_id)
+    except Exception as e:
+        print(f"ERROR ingestion job {job_id} could not update its job record: {e}")
+    finally:
+        session.close()
+
+
+def _member_file_type(name: str) -> str:
+    return name.rsplit(".", 1)[-1].lower() if "." in os.path.basename(name) else ""
+
+
+def run_archive_job(user_id: str, case_id: str, job_id: str, kind: str, spool_path: str, filename: str = None):
+    """
+    Worker-thread entry point for an archive upload.
+    Members are read out of the archive one at a time, spooled individually and ingested as member
+    jobs on a pool of ARCHIVE_MEMBER_WORKERS threads. At most that many members are spooled or in
+    flight at once, so the archive is never unpacked in full.
+    Reading stops at ARCHIVE_MAX_MEMBERS members, or as soon as one member decompresses past
+    ARCHIVE_MAX_MEMBER_BYTES or all spooled members past ARCHIVE_MAX_TOTAL_BYTES; members already
+    queued still finish and the archive job fails with the limit that was hit.
+    """
+    session = neo4j_handler.get_session()
+    workers = max(1, settings.ARCHIVE_MEMBER_WORKERS)
+    slots = threading.BoundedSemaphore(workers)
+    skipped: List[str] = []
+    skipped_count = 0
+    member_count = 0
+    spooled_bytes = 0
+    read_error = None
+    try:
+        jobs = IngestionJobStore(session, user_id)
+        jobs.mark_running(job_id)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive-member") as pool:
+            try:
+                for name, stream in iter_archive_members(spool_path, kind, filename):
+                    file_type = _member_file_type(name)
+                    if file_type not in ALLOWED_FILE_TYPES:
+                        skipped_count += 1
+                        if len(skipped) < ARCHIVE_SKIPPED_REPORT_LIMIT:
+                            skipped.append(name)
+                        continue
+                    if member_count >= settings.ARCHIVE_MAX_MEMBERS:
+                        raise ValueError(f"Archive has more than {settings.ARCHIVE_MAX_MEMBERS} members (ARCHIVE_MAX_MEMBERS)")
+                    
+                    remaining = settings.ARCHIVE_MAX_TOTAL_BYTES - spooled_bytes
+                    limit = min(settings.ARCHIVE_MAX_MEMBER_BYTES, remaining)
+                    # Wait for a free slot before pulling the next member out of the archive
+                    slots.acquire()
+                    try:
+                        try:
+                            member_spool, content_hash = spool_stream(stream, max_bytes=limit)
+                        except ValueError:
+                            if limit == remaining:
+                                raise ValueError(f"Archive decompresses to more than {settings.ARCHIVE_MAX_TOTAL_BYTES} bytes (ARCHIVE_MAX_TOTAL_BYTES)")
+                            raise ValueError(f"Member {name} decompresses to more than {settings.ARCHIVE_MAX_MEMBER_BYTES} bytes (ARCHIVE_MAX_MEMBER_BYTES)")
+                        spooled_bytes += os.path.getsize(member_spool)
+                        evidence_id = str(uuid.uuid4())
+                        member_job_id = str(uuid.uuid4())
+                        jobs.create_job(
+                            member_job_id, case_id, evidence_id, name, file_type,
+                            spool_path=member_spool, parent_job_id=job_id,
+                        )
+                    except Exception:
+                        slots.release()
+                        raise
+                    future = submit_job(
+                        pool, "archive_member",
+                        run_ingestion_job, user_id, case_id, member_job_id, evidence_id, name, file_type, member_spool, content_hash,
+                    )
+                    future.add_done_callback(lambda _future: slots.release())
+                    member_count += 1
+            except Exception as e:
+                # Members already queued still finish; the archive job reports the read error
+                print(f"ERROR reading archive for job {job_id}: {e}")
+                read_error = str(e)
+        
+        members = jobs.list_member_jobs(job_id)
+        failed = [member["filename"] for member in members if member["status"] == JOB_FAILED]
+        result = {
+            "members": len(members),
+            "succeeded": sum(1 for member in members if member["status"] == JOB_DONE),
+            "failed": failed,
+            "skipped": skipped,
+            "skipped_count": skipped_count,
+        }
+        if read_error or (members and len(failed) == len(members)):
+            INGESTION_JOBS.inc(kind="archive", status=JOB_FAILED)
+            jobs.mark_failed(job_id, read_error or "All archive members failed")
+        else:
+            INGESTION_JOBS.inc(kind="archive", status=JOB_DONE)
+            jobs.mark_done(job_id, result)
+        print(f"Archive job {job_id}: {result['succeeded']}/{len(members)} members ingested, {skipped_count} skipped")
+    except Exception as e:
+        print(f"ERROR archive job {job_id} could not update its job record: {e}")
+    finally:
+        session.close()
+        _remove_spool(spool_path)
+
 
 class IngestionService:
-    def __init__(self, session: Session, user_id: str):
+    def __init__(self, session: Session, user_id: str, graph_builder: GraphBuilder = None):
         self.session = session
         self.user_id = user_id
-        self.graph_builder = GraphBuilder(session)
+        # Injectable so benchmarks can run the pipeline against an in-memory graph store
+        self.graph_builder = graph_builder or GraphBuilder(session)
 
     async def process_evidence(self, case_id: str, file: UploadFile):
-        # 1. Validate and Parse
+        """Validate the upload, record a queued job and hand the work to the ingestion pool"""
+        # 1. Validate
         filename = file.filename
         file_ext = filename.split(".")[-1].lower()
         
-        allowed_types = ["json", "csv", "txt", "pdf", "png", "jpg", "jpeg", "gif", "bmp", "tiff", "webp", "docx"]
-        if file_ext not in allowed_types:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: .{file_ext}. Allowed: {', '.join(allowed_types)}")
+        if file_ext not in ALLOWED_FILE_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: .{file_ext}. Allowed: {', '.join(ALLOWED_FILE_TYPES)}")
             
-        parsed = await parse_file(file, file_ext)
-        
-        # parse_file now returns a dict with text + metadata
-        text = parsed["text"] if isinstance(parsed, dict) else parsed
-        file_metadata = parsed if isinstance(parsed, dict) else {"text": parsed, "file_type": file_ext, "filename": filename}
+        # The UploadFile is closed once the request returns, so spool it to disk here
+        spool_path, content_hash = await spool_upload(file)
         
         evidence_id = str(uuid.uuid4())
+        job_id = str(uuid.uuid4())
         
-        print(f"Processing evidence: {filename} (ID: {evidence_id}) for case: {case_id}")
+        try:
+            job = IngestionJobStore(self.session, self.user_id).create_job(
+                job_id, case_id, evidence_id, filename, file_ext, spool_path=spool_path
+            )
+            if not job:
+                raise HTTPException(status_code=404, detail="Case not found")
+            identical = self.graph_builder.find_evidence_by_content_hash(self.user_id, content_hash)
+        except Exception:
+            os.remove(spool_path)
+            raise
         
-        # 2. Create Evidence Node
+        submit_job(
+            get_ingestion_executor(), "file",
+            run_ingestion_job, self.user_id, case_id, job_id, evidence_id, filename, file_ext, spool_path, content_hash,
+        )
+        print(f"Queued ingestion job {job_id} for evidence: {filename} (ID: {evidence_id}) in case: {case_id}")
+        return {
+            "status": job["status"],
+            "job_id": job_id,
+            "evidence_id": evidence_id,
+            "filename": filename,
+            "content_hash": content_hash,
+            # Identical content seen before: its chunks will be served from the dedup path
+            "identical_evidence": identical,
+        }
+
+    async def process_archive(self, case_id: str, file: UploadFile):
+        """Spool a zip/tar(.gz)/gzip upload and queue one archive job that fans its members out"""
+        filename = file.filename or ""
+        kind = archive_kind(filename)
+        if not kind:
+            raise HTTPException(status_code=400, detail="Unsupported archive type. Allowed: .zip, .tar, .tar.gz, .tgz, .gz")
+        
+        spool_path, _content_hash = await spool_upload(file)
+        job_id = str(uuid.uuid4())
         try:
-            self.graph_builder.create_evidence_node(self.user_id, case_id, evidence_id, filename, file_ext)
-            print(f"Created evidence node: {evidence_id}")
-        except Exception as e:
-            print(f"ERROR creating evidence node: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to create evidence: {str(e)}")
+            job = IngestionJobStore(self.session, self.user_id).create_job(job_id, case_id, None, filename, kind)
+            if not job:
+                raise HTTPException(status_code=404, detail="Case not found")
+        except Exception:
+            os.remove(spool_path)
+            raise
         
-        # 3. Chunking (pass metadata for enrichment)
-        chunks = chunk_text(text, evidence_id, metadata=file_metadata)
-        print(f"Created {len(chunks)} chunks from evidence")
+        submit_job(get_ingestion_executor(), "archive", run_archive_job, self.user_id, case_id, job_id, kind, spool_path, filename)
+        print(f"Queued archive job {job_id} for {filename} in case: {case_id}")
+        return {"status": job["status"], "job_id": job_id, "filename": filename}
+
+    def resume_evidence(self, evidence_id: str):
+        """Queue a job that continues a failed ingestion from its last committed chunk"""
+        jobs = IngestionJobStore(self.session, self.user_id)
+        last_job = jobs.latest_job_for_evidence(evidence_id)
+        if not last_job:
+            raise HTTPException(status_code=404, detail="No ingestion job found for this evidence")
+        if last_job["status"] != JOB_FAILED:
+            raise HTTPException(status_code=409, detail=f"Latest ingestion job is {last_job['status']}; only failed ingestion can be resumed")
+        spool_path = last_job.get("spool_path")
+        if not spool_path or not os.path.exists(spool_path):
+            raise HTTPException(status_code=409, detail="The original upload is no longer available; delete and re-upload the evidence")
         
-        # 4. Processing Chunks
-        for idx, chunk in enumerate(chunks):
-            chunk_id = str(uuid.uuid4())
-            chunk["chunk_id"] = chunk_id
-            
-            # AI Triage
-            chunk_text_str = chunk["text"]
-            print(f"Processing chunk {idx + 1}/{len(chunks)} (ID: {chunk_id})")
-            
-            try:
-                entities = extract_entities(chunk_text_str)
-                print(f"  - Extracted {len(entities)} entities")
-            except Exception as e:
-                print(f"ERROR extracting entities from chunk {chunk_id}: {e}")
-                entities = []
-            
-            try:
-                risk_score = calculate_risk_score(chunk_text_str, chunk)
-                print(f"  - Calculated risk score: {risk_score}")
-            except Exception as e:
-                print(f"ERROR calculating risk score for chunk {chunk_id}: {e}")
-                risk_score = 0.0
-            
+        checkpoint = self.graph_builder.get_evidence_checkpoint(evidence_id)
+        if not checkpoint:
+            # Nothing to resume into; the spool would otherwise outlive every way to reach it
+            _remove_spool(spool_path)
+            jobs.clear_spool_path(evidence_id)
+            raise HTTPException(status_code=404, detail="Evidence not found")
+        
+        job_id = str(uuid.uuid4())
+        job = jobs.create_job(
+            job_id,
+            last_job["case_id"],
+            evidence_id,
+            last_job["filename"],
+            last_job["file_type"],
+            spool_path=spool_path,
+            resumed_from=last_job["job_id"],
+        )
+        submit_job(
+            get_ingestion_executor(),
+            "file",
+            run_ingestion_job,
+            self.user_id,
+            last_job["case_id"],
+            job_id,
+            evidence_id,
+            last_job["filename"],
+            last_job["file_type"],
+            spool_path,
+            checkpoint["content_hash"],
+            True,
+        )
+        print(f"Queued resume job {job_id} for evidence {evidence_id} from chunk {checkpoint['chunks_committed']}")
+        return {
+            "status": job["status"],
+            "job_id": job_id,
+            "evidence_id": evidence_id,
+            "resumed_from_chunk": checkpoint["chunks_committed"],
+        }
+
+    def ingest(
+        self,
+        case_id: str,
+        evidence_id: str,
+        parsed: Dict[str, Any],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        content_hash: str = None,
+        resume: bool = False,
+        timings: StageTimings = None,
+    ) -> Dict[str, Any]:
+        """
+        Chunk, triage, embed and store parsed evidence, in windows of INGESTION_WINDOW_CHUNKS.
+        The evidence checkpoint advances once per window, after every write stage of the window has
+        committed, so a chunk only counts as committed with its entities and relationships in place.
+        A failure repeats at most one window; chunk ids are deterministic, so the rewrite is idempotent.
+        With resume=True chunks below the checkpoint are skipped and the existing Evidence node is reused.
+        Stage durations are recorded in `timings` (and the metrics registry) and summarised in the result.
+        """
+        if timings is None:
+            timings = StageTimings()
+        filename = parsed.get("filename", "unknown")
+        file_ext = parsed.get("file_type", "")
+        
+        print(f"Processing evidence: {filename} (ID: {evidence_id}) for case: {case_id}")
+        
+        # 2. Create Evidence Node (or pick up the checkpoint of the existing one)
+        start = 0
+        if resume:
+            checkpoint = self.graph_builder.get_evidence_checkpoint(evidence_id)
+            if not checkpoint:
+                raise RuntimeError(f"Cannot resume: evidence {evidence_id} not found")
+            start = checkpoint["chunks_committed"]
+            self.graph_builder.set_evidence_status(evidence_id, "processing")
+            print(f"Resuming evidence {evidence_id} from chunk {start}")
+        else:
             try:
-                embedding = get_embedding(chunk_text_str)
-                print(f"  - Generated embedding")
+                self.graph_builder.create_evidence_node(self.user_id, case_id, evidence_id, filename, file_ext, content_hash)
+                print(f"Created evidence node: {evidence_id}")
             except Exception as e:
-                print(f"ERROR generating embedding for chunk {chunk_id}: {e}")
-                embedding = []
+                print(f"ERROR creating evidence node: {e}")
+                raise RuntimeError(f"Failed to create evidence: {str(e)}") from e
+        
+        # 3. Chunking (pass metadata for enrichment)
+        if "segments" in parsed:
+            make_segments = parsed["segments"]
+        else:
+            make_segments = lambda: [parsed["text"]]
+        # Row-structured evidence is chunked N records at a time with its header repeated, log
+        # evidence on record boundaries, everything else in token windows.
+        # A cheap counting pass gives the job its total up front; chunks are then produced lazily
+        with timings.stage("count"):
+            if "records" in parsed:
+                chunk_mode = "records"
+            else:
+                chunk_mode = select_chunk_mode(file_ext, make_segments)
+            if chunk_mode == "records":
+                header = parsed.get("header", "")
+                max_records = parsed.get("max_records")
+                total = count_record_chunks(parsed["records"](), header, max_records)
+                chunks = chunk_records(parsed["records"](), evidence_id, metadata=parsed, header=header, max_records=max_records)
+            elif chunk_mode == "lines":
+                total = count_log_chunks(make_segments())
+                chunks = chunk_log_segments(make_segments(), evidence_id, metadata=parsed)
+            else:
+                total = count_chunks(sum(1 for _ in iter_tokens(make_segments())))
+                chunks = chunk_segments(make_segments(), evidence_id, metadata=parsed)
+        print(f"Created {total} chunks from evidence ({chunk_mode} mode)")
+        # Chunking is deterministic, so skipping the committed prefix lines up with the stored chunk ids
+        if start:
+            chunks = islice(chunks, start, None)
+        if progress_callback:
+            progress_callback(start, total)
+        
+        graph_write: Dict[str, Dict[str, Any]] = {}
+        window_size = max(1, settings.INGESTION_WINDOW_CHUNKS)
+        done = start
+        reused = 0
+        while True:
+            # Streamed evidence is read and parsed lazily, so this also covers reading the spool
+            with timings.stage("chunk"):
+                window = list(islice(chunks, window_size))
+            if not window:
+                break
+            processed, window_reused = self._process_chunks(window, evidence_id, timings)
+            reused += window_reused
             
-            # 5. Store in Graph
-            try:
-                self.graph_builder.store_chunk(self.user_id, case_id, chunk, embedding, risk_score, entities)
-                print(f"  - Stored chunk with {len(entities)} entities")
-            except Exception as e:
-                print(f"ERROR storing chunk {chunk_id}: {e}")
-                # Continue processing other chunks
-                continue
+            # 5. Store in Graph (bulk UNWIND writes, a few transactions per window)
+            with timings.stage("graph_write"):
+                stats = self.graph_builder.store_chunks_bulk(case_id, evidence_id, processed)
+            _merge_stage_totals(graph_write, stats["stages"])
+            INGESTION_CHUNKS.inc(window_reused, source="reused")
+            INGESTION_CHUNKS.inc(len(window) - window_reused, source="computed")
+            INGESTION_ENTITIES.inc(sum(len(item["entities"] or []) for item in processed))
+            # Keep this process's in-memory case index (if loaded) and the case's ANN index in step with the graph
+            stored_vectors = [(item["chunk"]["chunk_id"], item["embedding"]) for item in processed]
+            vector_index.add_chunks(case_id, stored_vectors)
+            ann_index.add_chunks(case_id, stored_vectors)
             
-        print(f"Completed processing evidence {evidence_id}: {len(chunks)} chunks processed")
-        return {"status": "processed", "evidence_id": evidence_id, "chunks": len(chunks)}
+            done += len(window)
+            self.graph_builder.set_evidence_checkpoint(evidence_id, done)
+            print(f"Stored {done}/{total} chunks for evidence {evidence_id}")
+            if progress_callback:
+                progress_callback(done, total)
+        
+        # Persist the case's ANN index once per evidence rather than after every window; builds it once the case is large enough
+        ann_index.flush_case(self.session, self.user_id, case_id)
+        self.graph_builder.set_evidence_status(evidence_id, "indexed")
+        print(f"Completed processing evidence {evidence_id}: {done} chunks processed")
+        return {
+            "status": "processed",
+            "evidence_id": evidence_id,
+            "chunks": done,
+            "resumed_from_chunk": start,
+            "chunk_mode": chunk_mode,
+            "ocr": parsed.get("ocr"),
+            "stage_timings": timings.summary(),
+            "graph_write": graph_write,
+            "dedup": {
+                "chunks_reused": reused,
+                "chunks_computed": done - start - reused,
+                "hit_rate": round(reused / (done - start), 4) if done > start else 0.0,
+            },
+        }
+
+    def _process_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        evidence_id: str,
+        timings: StageTimings = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        4. AI triage for a window of chunks: NER, risk scoring and embeddings.
+        Chunk texts already triaged (in the graph or earlier in this window) reuse those results.
+        Returns the processed chunks and how many of them were reused.
+        """
+        for chunk in chunks:
+            chunk["chunk_id"] = chunk_id_for(evidence_id, chunk["chunk_index"])
+            chunk["text_hash"] = hashlib.sha256(chunk["text"].encode("utf-8")).hexdigest()
+
+        if timings is None:
+            timings = StageTimings()
+        unique_hashes = list(dict.fromkeys(chunk["text_hash"] for chunk in chunks))
+        try:
+            with timings.stage("dedup_lookup"):
+                known = self.graph_builder.find_chunks_by_text_hash(self.user_id, unique_hashes)
+        except Exception as e:
+            print(f"ERROR looking up chunk hashes for evidence {evidence_id}: {e}")
+            known = {}
+
+        # One representative chunk per text that still needs computing
+        pending: Dict[str, Dict[str, Any]] = {}
+        for chunk in chunks:
+            if chunk["text_hash"] not in known and chunk["text_hash"] not in pending:
+                pending[chunk["text_hash"]] = chunk
+        to_compute = list(pending.values())
+        if to_compute:
+            known.update(self._triage_chunks(to_compute, evidence_id, timings))
+
+        processed = []
+        for chunk in chunks:
+            result = known[chunk["text_hash"]]
+            # A failed NER/embedding result must not be reused for later copies of the text:
+            # such chunks are stored without a text_hash so the dedup lookup never matches them
+            if not result.get("triaged", True):
+                chunk["text_hash"] = None
+            processed.append({
+                "chunk": chunk,
+                "embedding": result["embedding"],
+                "risk_score": result["risk_score"],
+                "entities": result["entities"],
+            })
+        reused = len(chunks) - len(to_compute)
+        if reused:
+            print(f"  - Reused triage results for {reused}/{len(chunks)} chunks")
+        return processed, reused
+
+    def _triage_chunks(self, chunks: List[Dict[str, Any]], evidence_id: str, timings: StageTimings) -> Dict[str, Dict[str, Any]]:
+        """
+        Run NER, risk scoring and embedding for chunks; results keyed by text hash.
+        Results carry triaged=False when NER or embedding failed, so they are never offered for reuse.
+        """
+        # Run NER for the whole batch through one nlp.pipe stream
+        ner_ok = True
+        try:
+            with timings.stage("ner"):
+                entities_by_chunk = extract_entities_batch([chunk["text"] for chunk in chunks])
+        except Exception as e:
+            print(f"ERROR extracting entities for evidence {evidence_id}: {e}")
+            entities_by_chunk = [[] for _ in chunks]
+            ner_ok = False
+
+        risk_scores = []
+        with timings.stage("risk"):
+            for chunk in chunks:
+                try:
+                    risk_score = calculate_risk_score(chunk["text"], chunk)
+                except Exception as e:
+                    print(f"ERROR calculating risk score for chunk {chunk['chunk_id']}: {e}")
+                    risk_score = 0.0
+                risk_scores.append(risk_score)
+
+        # Embed the window in batched passes rather than one encode() per chunk
+        try:
+            with timings.stage("embed"):
+                embeddings = get_embeddings([chunk["text"] for chunk in chunks])
+        except Exception as e:
+            print(f"ERROR generating embeddings for evidence {evidence_id}: {e}")
+            embeddings = [[] for _ in chunks]
+
+        return {
+            chunk["text_hash"]: {
+                "embedding": embedding,
+                "risk_score": risk_score,
+                "entities": entities,
+                "triaged": ner_ok and len(embedding) > 0,
+            }
+            for chunk, embedding, risk_score, entities in zip(chunks, embeddings, risk_scores, entities_by_chunk)
+        }
+
+    def get_job(self, job_id: str):
+        return IngestionJobStore(self.session, self.user_id).get_job(job_id)
+
+    def get_jobs_for_case(self, case_id: str):
+        return IngestionJobStore(self.session, self.user_id).list_jobs(case_id)
 
     def get_evidence(self, evidence_id: str):
         query = """
@@ -110,7 +572,7 @@ class IngestionService:
                e.file_type as file_type,
                e.uploaded_at as uploaded_at,
                chunk_count,
-               'indexed' as status
+               coalesce(e.status, 'indexed') as status
         ORDER BY e.uploaded_at DESC
         """
         result = self.session.run(query, case_id=case_id)
@@ -129,6 +591,12 @@ class IngestionService:
 
     def delete_evidence(self, evidence_id: str, case_id: str):
         """Delete evidence and all associated chunks, entity references, and query links"""
+        # 0. Drop spooled uploads kept around for resuming failed ingestion
+        jobs = IngestionJobStore(self.session, self.user_id)
+        for spool_path in jobs.spool_paths_for_evidence(evidence_id):
+            _remove_spool(spool_path)
+        jobs.clear_spool_path(evidence_id)
+
         # 1. Delete RETRIEVED relationships from queries to chunks of this evidence
         self.session.run("""
             MATCH (:Evidence {evidence_id: $evidence_id})-[:HAS_CHUNK]->(ch:Chunk)
@@ -150,10 +618,15 @@ class IngestionService:
         """, evidence_id=evidence_id)
         
         # 3. Delete chunks
-        self.session.run("""
+        deleted_chunks = self.session.run("""
             MATCH (:Evidence {evidence_id: $evidence_id})-[:HAS_CHUNK]->(ch:Chunk)
+            WITH ch, ch.chunk_id as chunk_id
             DETACH DELETE ch
-        """, evidence_id=evidence_id)
+            RETURN collect(chunk_id) as chunk_ids
+        """, evidence_id=evidence_id).single()
+        deleted_chunk_ids = deleted_chunks["chunk_ids"] if deleted_chunks else []
+        vector_index.remove_chunks(case_id, deleted_chunk_ids)
+        ann_index.remove_chunks(case_id, deleted_chunk_ids)
         
         # 4. Delete evidence node
         result = self.session.run("""
@@ -1,11 +1,14 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from neo4j.exceptions import ServiceUnavailable, SessionExpired
 from app.core.config import settings
+from app.core.metrics import REGISTRY
 from app.db.neo4j import neo4j_handler
-from app.ai.nlp import load_nlp_model
-from app.ai.embeddings import load_embedding_model
+from app.graph.builder import GraphBuilder
+from app.ai.warmup import model_status, start_model_warmup
+from app.ingestion.jobs import IngestionJobStore, shutdown_ingestion_executor, start_job_heartbeat, stop_job_heartbeat
+from app.ingestion.parsers import shutdown_ocr_pool, shutdown_pdf_pool
 from app.auth.router import router as auth_router
 from app.cases.router import router as cases_router
 from app.ingestion.router import router as evidence_router
@@ -51,15 +54,33 @@ async def startup_event():
     except Exception as e:
         print(f"Failed to connect to Neo4j: {e}")
 
-    # 2. Load Models
-    print("Loading AI Models...")
-    load_nlp_model()
-    load_embedding_model()
-    print("AI Models loaded.")
+    # Jobs whose worker stopped renewing its lease (a previous process, a crashed replica) have no worker any more;
+    # jobs of other live workers keep their lease and are left alone
+    try:
+        session = neo4j_handler.get_session()
+        try:
+            interrupted = IngestionJobStore(session).fail_expired_jobs()
+            # Schema bootstrap: Chunk vector index for retrieval (skipped on servers without vector support)
+            GraphBuilder(session).ensure_vector_index()
+        finally:
+            session.close()
+        if interrupted:
+            print(f"Marked {interrupted} interrupted ingestion job(s) as failed.")
+    except Exception as e:
+        print(f"Could not reconcile ingestion jobs: {e}")
+    start_job_heartbeat()
+
+    # 2. Warm up models in the background; model-backed endpoints answer 503 until they are ready
+    print("Warming up AI Models in the background...")
+    start_model_warmup()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Shutting down...")
+    stop_job_heartbeat()
+    shutdown_ingestion_executor(wait=False)
+    shutdown_pdf_pool(wait=False)
+    shutdown_ocr_pool(wait=False)
     neo4j_handler.close()
     print("Neo4j connection closed.")
 
@@ -74,3 +95,26 @@ app.include_router(graph_router, prefix="/graph", tags=["Graph Analysis"])
 @app.get("/")
 def read_root():
     return {"message": "Welcome to NexusTrace API"}
+
+@app.get("/health/ready")
+def readiness():
+    """Per-dependency readiness (Neo4j, NER, embeddings); 503 until every dependency is ready"""
+    dependencies = model_status()
+    try:
+        neo4j_handler.connect()
+        neo4j_handler.driver.verify_connectivity()
+        dependencies["neo4j"] = {"status": "ready", "detail": None}
+    except Exception as e:
+        dependencies["neo4j"] = {"status": "failed", "detail": str(e)}
+
+    ready = all(dependency["status"] == "ready" for dependency in dependencies.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "dependencies": dependencies},
+    )
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Ingestion stage histograms, chunk/entity counters and queue gauges for Prometheus"""
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
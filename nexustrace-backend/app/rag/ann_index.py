@@ -0,0 +1,403 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from neo4j import Session
+
+from app.ai.embeddings import decode_embedding
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.neo4j import neo4j_handler
+from app.rag import vector_index
+
+_hnswlib_module = None
+_hnswlib_import_error = None
+
+
+def _get_hnswlib():
+    # hnswlib is optional; without it the ann backend serves exact in-memory search
+    global _hnswlib_module, _hnswlib_import_error
+
+    if _hnswlib_module is not None:
+        return _hnswlib_module
+    if _hnswlib_import_error is not None:
+        return None
+    try:
+        import hnswlib
+
+        _hnswlib_module = hnswlib
+    except Exception as e:
+        _hnswlib_import_error = e
+        print("WARNING: hnswlib could not be imported. VECTOR_SEARCH_BACKEND=ann will use exact in-memory search.")
+        print(f"hnswlib import details: {e}")
+        return None
+    return _hnswlib_module
+
+
+def index_dir() -> str:
+    if settings.ANN_INDEX_DIR:
+        return settings.ANN_INDEX_DIR
+    backend_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(backend_root, "ann_indexes")
+
+
+def _index_paths(case_id: str) -> Tuple[str, str]:
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", case_id)
+    base = os.path.join(index_dir(), safe)
+    return base + ".hnsw", base + ".ids.json"
+
+
+class CaseAnnIndex:
+    """
+    HNSW graph over one case's L2-normalized chunk embeddings (cosine space).
+    hnswlib labels are positions in `chunk_ids`; deleted chunks keep their slot as None and are
+    marked deleted in the graph. Every operation holds the index lock, so ingestion threads can
+    add while request threads search.
+    """
+
+    def __init__(self, index, chunk_ids: List[Optional[str]], loaded_mtime: float = 0.0):
+        self.index = index
+        self.chunk_ids = chunk_ids
+        self.labels = {chunk_id: label for label, chunk_id in enumerate(chunk_ids) if chunk_id is not None}
+        self.loaded_mtime = loaded_mtime
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    @classmethod
+    def create(cls, dimensions: int, capacity: int) -> "CaseAnnIndex":
+        index = _get_hnswlib().Index(space="cosine", dim=dimensions)
+        index.init_index(
+            max_elements=max(capacity, 1024),
+            ef_construction=settings.ANN_EF_CONSTRUCTION,
+            M=settings.ANN_M,
+        )
+        return cls(index, [])
+
+    @property
+    def nbytes(self) -> int:
+        # Vectors plus roughly 2*M links per element on layer 0
+        dimensions = self.index.dim
+        return len(self.chunk_ids) * (4 * dimensions + 8 * settings.ANN_M + 64)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def add(self, chunk_ids: List[str], vectors: np.ndarray):
+        """Insert or replace chunks; vectors must already have the index dimension"""
+        if not chunk_ids:
+            return
+        with self.lock:
+            labels = []
+            for chunk_id in chunk_ids:
+                label = self.labels.get(chunk_id)
+                if label is None:
+                    label = len(self.chunk_ids)
+                    self.chunk_ids.append(chunk_id)
+                    self.labels[chunk_id] = label
+                labels.append(label)
+            needed = len(self.chunk_ids)
+            if needed > self.index.get_max_elements():
+                self.index.resize_index(max(needed, 2 * self.index.get_max_elements()))
+            self.index.add_items(vectors, np.asarray(labels, dtype=np.int64))
+            self.dirty = True
+
+    def remove(self, chunk_ids: Iterable[str]):
+        with self.lock:
+            for chunk_id in chunk_ids:
+                label = self.labels.pop(chunk_id, None)
+                if label is None:
+                    continue
+                self.index.mark_deleted(label)
+                self.chunk_ids[label] = None
+                self.dirty = True
+
+    def search(self, query: Any, top_k: int) -> List[Tuple[str, float]]:
+        """Approximate top-k (chunk_id, cosine) pairs, best first; ANN_EF_SEARCH trades recall for latency"""
+        vector = decode_embedding(query)
+        with self.lock:
+            k = min(top_k, len(self.labels))
+            if k <= 0 or vector.size != self.index.dim:
+                return []
+            self.index.set_ef(max(settings.ANN_EF_SEARCH, k))
+            labels, distances = self.index.knn_query(vector.reshape(1, -1), k=k)
+            return [(self.chunk_ids[label], 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
+
+    def save(self, case_id: str):
+        """Persist to ANN_INDEX_DIR (written to temp files, then renamed into place)"""
+        index_path, ids_path = _index_paths(case_id)
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with self.lock:
+            self.index.save_index(index_path + ".tmp")
+            with open(ids_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.chunk_ids, f)
+            os.replace(ids_path + ".tmp", ids_path)
+            os.replace(index_path + ".tmp", index_path)
+            self.loaded_mtime = os.path.getmtime(index_path)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, case_id: str) -> Optional["CaseAnnIndex"]:
+        index_path, ids_path = _index_paths(case_id)
+        if not (os.path.exists(index_path) and os.path.exists(ids_path)) or _get_hnswlib() is None:
+            return None
+        try:
+            with open(ids_path, "r", encoding="utf-8") as f:
+                chunk_ids = json.load(f)
+            index = _get_hnswlib().Index(space="cosine", dim=settings.EMBEDDING_DIMENSIONS)
+            index.load_index(index_path, max_elements=max(len(chunk_ids), 1024))
+        except Exception as e:
+            print(f"WARNING: Could not load ANN index for case {case_id}: {e}")
+            return None
+        if index.get_current_count() != len(chunk_ids):
+            print(f"WARNING: ANN index for case {case_id} does not match its id list; ignoring it")
+            return None
+        # Slots freed by deletions have to be re-marked after a load
+        for label, chunk_id in enumerate(chunk_ids):
+            if chunk_id is None:
+                try:
+                    index.mark_deleted(label)
+                except RuntimeError:
+                    pass
+        return cls(index, chunk_ids, loaded_mtime=os.path.getmtime(index_path))
+
+
+def _flush_evicted(case_id: str, index: CaseAnnIndex):
+    if index.dirty:
+        index.save(case_id)
+
+
+# Loaded case indexes, bounded by ANN_CACHE_MAX_MB; dirty indexes are saved when evicted
+_indexes = LRUCache(
+    settings.VECTOR_MEMORY_INDEX_MAX_CASES,
+    max_weight=settings.ANN_CACHE_MAX_MB * 1024 * 1024,
+    weigh=lambda index: index.nbytes,
+    on_evict=_flush_evicted,
+)
+_lock = threading.Lock()
+# Serialises loads from disk so a query and an ingestion thread never load two copies of one case
+_load_lock = threading.Lock()
+# Cases whose index is being built in the background: the exact index that serves queries
+# meanwhile (None until loaded), the changes that arrive before the build finishes, and whether
+# the case was deleted mid-build
+_building: Dict[str, Dict[str, Any]] = {}
+
+
+def _get_index(case_id: str) -> Optional[CaseAnnIndex]:
+    index = _indexes.get(case_id)
+    index_path, _ = _index_paths(case_id)
+    # Another worker process may have saved a newer index; reload unless ours has unsaved changes
+    if index is not None and not index.dirty and os.path.exists(index_path) and os.path.getmtime(index_path) > index.loaded_mtime:
+        index = None
+    if index is None:
+        with _load_lock:
+            index = _indexes.peek(case_id)
+            if index is None or (not index.dirty and os.path.exists(index_path) and os.path.getmtime(index_path) > index.loaded_mtime):
+                index = CaseAnnIndex.load(case_id)
+                if index is not None:
+                    _indexes.put(case_id, index)
+    return index
+
+
+def _normalized_rows(rows: Iterable[Tuple[str, Any]]) -> Tuple[List[str], np.ndarray]:
+    chunk_ids = []
+    vectors = []
+    for chunk_id, embedding in rows:
+        vector = decode_embedding(embedding)
+        if vector.size != settings.EMBEDDING_DIMENSIONS:
+            continue
+        chunk_ids.append(chunk_id)
+        vectors.append(vector)
+    if not vectors:
+        return [], np.empty((0, settings.EMBEDDING_DIMENSIONS), dtype=np.float32)
+    return chunk_ids, np.vstack(vectors)
+
+
+def build_index(chunk_ids: List[str], matrix: np.ndarray, batch_size: int = 50000) -> CaseAnnIndex:
+    """Build an HNSW index from an (n, dim) embedding matrix, inserting in batches"""
+    index = CaseAnnIndex.create(matrix.shape[1], len(chunk_ids))
+    for start in range(0, len(chunk_ids), batch_size):
+        index.add(list(chunk_ids[start:start + batch_size]), matrix[start:start + batch_size])
+    return index
+
+
+def _remove_index_files(case_id: str):
+    for path in _index_paths(case_id):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _load_exact_for_build(user_id: str, case_id: str) -> "vector_index.CaseVectorIndex":
+    session = neo4j_handler.get_session()
+    try:
+        exact = vector_index.load_case_index(session, user_id, case_id)
+    finally:
+        session.close()
+    with _lock:
+        building = _building.get(case_id)
+        if building is not None and building["exact"] is None:
+            building["exact"] = exact
+    return exact
+
+
+def _build_in_background(case_id: str, exact: Optional["vector_index.CaseVectorIndex"], user_id: str = None):
+    """
+    Build, save and publish a case's index. Changes queued while building are applied before the
+    index is published, and it is saved while the case is still marked as building, so a drop_case
+    that lands meanwhile cancels the build instead of racing its save.
+    """
+    try:
+        if exact is None:
+            exact = _load_exact_for_build(user_id, case_id)
+        print(f"Building ANN index for case {case_id} ({len(exact)} chunks)...")
+        index = build_index(list(exact.chunk_ids), exact.matrix)
+        while True:
+            with _lock:
+                building = _building[case_id]
+                pending = building["pending"]
+                building["pending"] = []
+            for change, payload in pending:
+                if change == "add":
+                    index.add(*payload)
+                else:
+                    index.remove(payload)
+            if building["cancelled"]:
+                break
+            index.save(case_id)
+            with _lock:
+                if building["cancelled"]:
+                    break
+                if not building["pending"]:
+                    # Publish and stop diverting changes in one step
+                    _building.pop(case_id)
+                    _indexes.put(case_id, index)
+                    break
+        if building["cancelled"]:
+            # The case was deleted mid-build; drop_case may have run before this build's save
+            _remove_index_files(case_id)
+            with _lock:
+                _building.pop(case_id, None)
+            print(f"ANN index build for case {case_id} cancelled: case deleted")
+            return
+        # The exact matrix is no longer needed for this case
+        vector_index.invalidate_case(case_id)
+        print(f"ANN index for case {case_id} ready: {len(index)} chunks")
+    except Exception as e:
+        print(f"ERROR building ANN index for case {case_id}: {e}")
+        with _lock:
+            _building.pop(case_id, None)
+
+
+def _start_build(case_id: str, exact: Optional["vector_index.CaseVectorIndex"], user_id: str = None) -> bool:
+    with _lock:
+        if case_id in _building:
+            return False
+        _building[case_id] = {"exact": exact, "pending": [], "cancelled": False}
+    threading.Thread(
+        target=_build_in_background, args=(case_id, exact, user_id), name=f"ann-build-{case_id}", daemon=True
+    ).start()
+    return True
+
+
+def search_case(session: Session, user_id: str, case_id: str, query: Any, top_k: int) -> List[Tuple[str, float]]:
+    """
+    Top-k (chunk_id, cosine) pairs for the case from its HNSW index. Cases below ANN_MIN_CHUNKS,
+    or whose index is still being built, are answered exactly from the in-memory NumPy index.
+    Ingestion normally builds the index when a case crosses ANN_MIN_CHUNKS (flush_case); a large
+    case without one (ingested before the backend was switched to ann, or after a failed build)
+    starts its build here.
+    """
+    if _get_hnswlib() is not None:
+        with _lock:
+            building = _building.get(case_id)
+        if building is not None and building["exact"] is not None:
+            return building["exact"].search(query, top_k)
+        if building is None:
+            index = _get_index(case_id)
+            if index is not None:
+                return index.search(query, top_k)
+
+    exact = vector_index.load_case_index(session, user_id, case_id)
+    if len(exact) >= settings.ANN_MIN_CHUNKS and _get_hnswlib() is not None:
+        _start_build(case_id, exact)
+    return exact.search(query, top_k)
+
+
+def add_chunks(case_id: str, rows: Iterable[Tuple[str, Any]]):
+    """Insert newly stored chunks into the case's ANN index if one exists (saved by flush_case)"""
+    if _get_hnswlib() is None:
+        return
+    chunk_ids, vectors = _normalized_rows(rows)
+    if not chunk_ids:
+        return
+    with _lock:
+        if case_id in _building:
+            _building[case_id]["pending"].append(("add", (chunk_ids, vectors)))
+            return
+    index = _get_index(case_id)
+    if index is not None:
+        index.add(chunk_ids, vectors)
+
+
+def remove_chunks(case_id: str, chunk_ids: Iterable[str]):
+    if _get_hnswlib() is None:
+        return
+    chunk_ids = list(chunk_ids)
+    with _lock:
+        if case_id in _building:
+            _building[case_id]["pending"].append(("remove", chunk_ids))
+            return
+    index = _get_index(case_id)
+    if index is not None:
+        index.remove(chunk_ids)
+        index.save(case_id)
+
+
+def _count_case_chunks(session: Session, user_id: str, case_id: str) -> int:
+    query = """
+    MATCH (u:User {id: $user_id})-[:CREATED]->(c:Case {case_id: $case_id})-[:HAS_EVIDENCE]->(:Evidence)-[:HAS_CHUNK]->(ch:Chunk)
+    WHERE ch.embedding IS NOT NULL
+    RETURN count(ch) as chunks
+    """
+    record = session.run(query, user_id=user_id, case_id=case_id).single()
+    return record["chunks"] if record else 0
+
+
+def flush_case(session: Session, user_id: str, case_id: str):
+    """
+    Called once per ingested evidence: persist the case's index if ingestion changed it, or, under
+    VECTOR_SEARCH_BACKEND=ann, start building it in the background once the case reaches
+    ANN_MIN_CHUNKS, so the first question after a bulk ingest is already served by HNSW
+    """
+    index = _indexes.peek(case_id)
+    if index is not None:
+        if index.dirty:
+            index.save(case_id)
+        return
+    if settings.VECTOR_SEARCH_BACKEND != "ann" or _get_hnswlib() is None:
+        return
+    with _lock:
+        if case_id in _building:
+            return
+    if _get_index(case_id) is not None:
+        return
+    try:
+        chunks = _count_case_chunks(session, user_id, case_id)
+    except Exception as e:
+        # The first large query will start the build instead
+        print(f"WARNING: Could not count chunks for ANN index of case {case_id}: {e}")
+        return
+    if chunks >= settings.ANN_MIN_CHUNKS:
+        _start_build(case_id, None, user_id)
+
+
+def drop_case(case_id: str):
+    with _lock:
+        building = _building.get(case_id)
+        if building is not None:
+            # The build thread removes whatever it saved and never publishes
+            building["cancelled"] = True
+        _indexes.pop(case_id)
+    _remove_index_files(case_id)
@@ -1,20 +1,23 @@
 import json
 import logging
-from typing import Any, Dict, List, Optional
-
-import requests
-from openai import OpenAI
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
 
 logger = logging.getLogger(__name__)
 
 
 class Generator:
     def __init__(self):
-        self.openai_client: Optional[OpenAI] = None
+        self.openai_client: Optional["OpenAI"] = None
         if settings.OPENAI_API_KEY:
+            # openai and requests are imported on first use to keep app import time down
+            from openai import OpenAI
+
             if settings.OPENAI_API_KEY.startswith("sk-or-"):
                 self.openai_client = OpenAI(
                     api_key=settings.OPENAI_API_KEY,
@@ -174,6 +177,8 @@ class Generator:
                 "parts": [{"text": system_message}],
             }
 
+        import requests
+
         response = requests.post(
             endpoint,
             params={"key": settings.GEMINI_API_KEY},
@@ -1,52 +1,148 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 from neo4j import Session
-from app.ai.embeddings import get_embedding
+from app.ai.embeddings import decode_embedding, get_query_embedding
 from app.core.config import settings
+from app.graph.builder import GraphBuilder
+from app.rag import ann_index, vector_index
 
 class Retriever:
     def __init__(self, session: Session):
         self.session = session
 
-    def retrieve(self, user_id: str, case_id: str, question: str):
-        # 1. Embed Question
-        question_embedding = get_embedding(question)
-        
-        # 2. Vector Search using manual cosine similarity
-        vector_query = """
-        MATCH (u:User {id: $user_id})-[:CREATED]->(c:Case {case_id: $case_id})-[:HAS_EVIDENCE]->(ev:Evidence)-[:HAS_CHUNK]->(ch:Chunk)
+    def _score_chunks(self, user_id: str, case_id: str, question_embedding) -> List[Tuple[str, float]]:
+        """
+        Cosine similarity of every embedded chunk in the case against the question, best first.
+        Only chunk ids and packed embeddings cross the wire; scoring is one NumPy matrix-vector product.
+        """
+        query = """
+        MATCH (u:User {id: $user_id})-[:CREATED]->(c:Case {case_id: $case_id})-[:HAS_EVIDENCE]->(:Evidence)-[:HAS_CHUNK]->(ch:Chunk)
         WHERE ch.embedding IS NOT NULL
-        WITH ch, ev,
-             reduce(dot = 0.0, i IN range(0, size(ch.embedding)-1) | dot + ch.embedding[i] * $embedding[i]) as dotProduct,
-             reduce(norm1 = 0.0, i IN range(0, size(ch.embedding)-1) | norm1 + ch.embedding[i] * ch.embedding[i]) as norm1,
-             reduce(norm2 = 0.0, i IN range(0, size($embedding)-1) | norm2 + $embedding[i] * $embedding[i]) as norm2
-        WITH ch, ev, dotProduct / (sqrt(norm1) * sqrt(norm2)) AS score
-        WHERE score > 0.3
-        RETURN ch, ev.filename as filename, ev.evidence_id as evidence_id, score
-        ORDER BY score DESC
-        LIMIT $top_k
+        RETURN ch.chunk_id as chunk_id, ch.embedding as embedding
         """
-        
-        results = self.session.run(vector_query, 
-                                   user_id=user_id,
-                                   case_id=case_id, 
-                                   embedding=question_embedding, 
-                                   top_k=settings.TOP_K_RETRIEVAL)
-        
-        print(f"DEBUG: Searching for chunks in case_id={case_id}, user_id={user_id}")
-        
-        vector_chunks = []
-        for record in results:
-            node = record["ch"]
-            vector_chunks.append({
-                "chunk_id": node["chunk_id"],
-                "text": node["text"],
-                "score": record["score"],
+        query_vector = decode_embedding(question_embedding)
+        chunk_ids = []
+        vectors = []
+        for record in self.session.run(query, user_id=user_id, case_id=case_id):
+            vector = decode_embedding(record["embedding"])
+            # Skip chunks whose embedding failed or came from a model with another dimension
+            if vector.shape != query_vector.shape:
+                continue
+            chunk_ids.append(record["chunk_id"])
+            vectors.append(vector)
+        if not vectors:
+            return []
+
+        matrix = np.vstack(vectors)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector)
+        scores = (matrix @ query_vector) / np.where(norms == 0, 1.0, norms)
+        order = np.argsort(-scores, kind="stable")
+        return [(chunk_ids[i], float(scores[i])) for i in order]
+
+    def _vector_index_search(self, user_id: str, case_id: str, question_embedding, top_k: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        Top chunks of the case from the Neo4j vector index, best first, as (chunk_id, cosine) pairs.
+        The index spans every case, so candidates are oversampled and filtered to the case; the
+        candidate count grows until top_k case hits are found or the index runs out. Returns None
+        when the index cannot answer (no server support, or too few case hits even at
+        VECTOR_INDEX_MAX_CANDIDATES), and the caller scans the case instead.
+        """
+        if not GraphBuilder(self.session).ensure_vector_index():
+            return None
+        query_vector = decode_embedding(question_embedding)
+        if query_vector.size != settings.EMBEDDING_DIMENSIONS:
+            return None
+
+        query = """
+        MATCH (:User {id: $user_id})-[:CREATED]->(:Case {case_id: $case_id})
+        CALL db.index.vector.queryNodes($index_name, $candidates, $embedding)
+        YIELD node, score
+        WITH collect({chunk_id: node.chunk_id, case_id: node.case_id, score: score}) as hits
+        RETURN size(hits) as returned,
+               [hit IN hits WHERE hit.case_id = $case_id | hit] as matches
+        """
+        max_candidates = max(settings.VECTOR_INDEX_MAX_CANDIDATES, top_k)
+        candidates = min(max(top_k * settings.VECTOR_INDEX_OVERSAMPLE, top_k), max_candidates)
+        while True:
+            try:
+                record = self.session.run(
+                    query,
+                    user_id=user_id,
+                    case_id=case_id,
+                    index_name=GraphBuilder.VECTOR_INDEX_NAME,
+                    candidates=candidates,
+                    embedding=query_vector.tolist(),
+                ).single()
+            except Exception as e:
+                print(f"WARNING: Vector index query failed, falling back to scanning case embeddings: {e}")
+                return None
+            if record is None:
+                return None
+            matches = record["matches"] or []
+            # Enough case hits, or the index has nothing more to give (small index / small case)
+            if len(matches) >= top_k or record["returned"] < candidates:
+                # The cosine index reports (1 + cosine) / 2; map back so thresholds match the scan path
+                return sorted(
+                    ((hit["chunk_id"], 2.0 * hit["score"] - 1.0) for hit in matches),
+                    key=lambda hit: hit[1],
+                    reverse=True,
+                )
+            if candidates >= max_candidates:
+                return None
+            candidates = min(candidates * 4, max_candidates)
+
+    def _load_chunks(self, scored: List[Tuple[str, float]]) -> List[Dict[str, Any]]:
+        """Chunk details for (chunk_id, score) pairs, preserving their order"""
+        if not scored:
+            return []
+        query = """
+        UNWIND $chunk_ids as chunk_id
+        MATCH (ev:Evidence)-[:HAS_CHUNK]->(ch:Chunk {chunk_id: chunk_id})
+        RETURN ch.chunk_id as chunk_id, ch.text as text, ch.filename as chunk_filename,
+               ch.page_number as page_number, ch.file_type as file_type, ch.chunk_index as chunk_index,
+               ev.filename as filename, ev.evidence_id as evidence_id
+        """
+        rows = {
+            record["chunk_id"]: record
+            for record in self.session.run(query, chunk_ids=[chunk_id for chunk_id, _ in scored])
+        }
+        chunks = []
+        for chunk_id, score in scored:
+            record = rows.get(chunk_id)
+            if record is None:
+                continue
+            chunks.append({
+                "chunk_id": chunk_id,
+                "text": record["text"],
+                "score": score,
                 "source": "vector",
-                "filename": record.get("filename") or node.get("filename", "Unknown"),
-                "evidence_id": record.get("evidence_id", ""),
-                "page_number": node.get("page_number"),
-                "file_type": node.get("file_type", ""),
-                "chunk_index": node.get("chunk_index", 0),
+                "filename": record["filename"] or record["chunk_filename"] or "Unknown",
+                "evidence_id": record["evidence_id"] or "",
+                "page_number": record["page_number"],
+                "file_type": record["file_type"] or "",
+                "chunk_index": record["chunk_index"] or 0,
             })
+        return chunks
+
+    def retrieve(self, user_id: str, case_id: str, question: str):
+        # 1. Embed Question (repeated questions are served from the query embedding cache)
+        question_embedding = get_query_embedding(question)
+        
+        # 2. Vector Search: Neo4j vector index when available, else cosine over the case's packed embeddings
+        print(f"DEBUG: Searching for chunks in case_id={case_id}, user_id={user_id}")
+        top_k = settings.TOP_K_RETRIEVAL
+        backend = settings.VECTOR_SEARCH_BACKEND.lower()
+        if backend == "ann":
+            scored = ann_index.search_case(self.session, user_id, case_id, question_embedding, top_k)
+        elif backend == "memory":
+            scored = vector_index.load_case_index(self.session, user_id, case_id).search(question_embedding, top_k)
+        else:
+            scored = self._vector_index_search(user_id, case_id, question_embedding, top_k)
+            if scored is None:
+                scored = self._score_chunks(user_id, case_id, question_embedding)
+            else:
+                print(f"DEBUG: Vector index returned {len(scored)} candidate chunks")
+        vector_chunks = self._load_chunks([(chunk_id, score) for chunk_id, score in scored if score > 0.3][:top_k])
         
         print(f"DEBUG: Found {len(vector_chunks)} chunks via vector search")
         if vector_chunks:
@@ -65,37 +161,8 @@ class Retriever:
                     print(f"DEBUG: No chunks found for case {case_id}. Evidence may not be uploaded or processed.")
                 else:
                     print(f"DEBUG: Chunks exist but similarity scores too low. Lowering threshold...")
-                    # Try again with lower threshold
-                    low_threshold_query = """
-                    MATCH (c:Case {case_id: $case_id})-[:HAS_EVIDENCE]->(ev:Evidence)-[:HAS_CHUNK]->(ch:Chunk)
-                    WHERE ch.embedding IS NOT NULL
-                    WITH ch, ev,
-                         reduce(dot = 0.0, i IN range(0, size(ch.embedding)-1) | dot + ch.embedding[i] * $embedding[i]) as dotProduct,
-                         reduce(norm1 = 0.0, i IN range(0, size(ch.embedding)-1) | norm1 + ch.embedding[i] * ch.embedding[i]) as norm1,
-                         reduce(norm2 = 0.0, i IN range(0, size($embedding)-1) | norm2 + $embedding[i] * $embedding[i]) as norm2
-                    WITH ch, ev, dotProduct / (sqrt(norm1) * sqrt(norm2)) AS score
-                    WHERE score > 0.1
-                    RETURN ch, ev.filename as filename, ev.evidence_id as evidence_id, score
-                    ORDER BY score DESC
-                    LIMIT $top_k
-                    """
-                    low_results = self.session.run(low_threshold_query, 
-                                                    case_id=case_id, 
-                                                    embedding=question_embedding, 
-                                                    top_k=settings.TOP_K_RETRIEVAL)
-                    for record in low_results:
-                        node = record["ch"]
-                        vector_chunks.append({
-                            "chunk_id": node["chunk_id"],
-                            "text": node["text"],
-                            "score": record["score"],
-                            "source": "vector",
-                            "filename": record.get("filename") or node.get("filename", "Unknown"),
-                            "evidence_id": record.get("evidence_id", ""),
-                            "page_number": node.get("page_number"),
-                            "file_type": node.get("file_type", ""),
-                            "chunk_index": node.get("chunk_index", 0),
-                        })
+                    # Try again with lower threshold (the scores are already computed)
+                    vector_chunks = self._load_chunks([(chunk_id, score) for chunk_id, score in scored if score > 0.1][:top_k])
                     print(f"DEBUG: Found {len(vector_chunks)} chunks with lower threshold")
             
         # 3. Graph Expansion
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 from typing import List
 from neo4j import Session
 from app.db.neo4j import get_db_session
+from app.ai.warmup import require_models
 from app.auth.router import get_current_user
 from app.schemas.rag import RAGQuery, RAGResponse, ExplanationResponse, QueryHistory
 from app.rag.service import RAGService
@@ -9,7 +10,7 @@ from app.cases.service import CaseService
 
 router = APIRouter()
 
-@router.post("/ask", response_model=RAGResponse)
+@router.post("/ask", response_model=RAGResponse, dependencies=[Depends(require_models("embeddings"))])
 def ask_rag(
     query: RAGQuery,
     current_user: dict = Depends(get_current_user),
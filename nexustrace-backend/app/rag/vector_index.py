@@ -0,0 +1,168 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from neo4j import Session
+
+from app.ai.embeddings import decode_embedding
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+
+class CaseVectorIndex:
+    """
+    Exact in-memory index for one case: a contiguous (n, dim) matrix of L2-normalized float32
+    embeddings plus the matching chunk ids. Instances are never mutated once published;
+    add()/remove() return a new index so concurrent searches always see a consistent snapshot.
+    """
+
+    def __init__(self, chunk_ids: Sequence[str], matrix: np.ndarray):
+        self.chunk_ids = np.asarray(chunk_ids, dtype=object)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[str, Any]], dimensions: int) -> "CaseVectorIndex":
+        """Index (chunk_id, stored embedding) pairs; embeddings of another dimension are skipped"""
+        chunk_ids = []
+        vectors = []
+        for chunk_id, embedding in rows:
+            vector = decode_embedding(embedding)
+            if vector.size != dimensions:
+                continue
+            chunk_ids.append(chunk_id)
+            vectors.append(vector)
+        matrix = cls._normalize(np.vstack(vectors)) if vectors else np.empty((0, dimensions), dtype=np.float32)
+        return cls(chunk_ids, matrix)
+
+    @property
+    def nbytes(self) -> int:
+        # Chunk ids are small strings; the matrix dominates
+        return int(self.matrix.nbytes) + 64 * len(self.chunk_ids)
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def search(self, query: Any, top_k: int) -> List[Tuple[str, float]]:
+        """Top-k (chunk_id, cosine) pairs, best first: one matrix-vector product plus argpartition"""
+        if not len(self.chunk_ids) or top_k <= 0:
+            return []
+        vector = decode_embedding(query)
+        if vector.size != self.matrix.shape[1]:
+            return []
+        norm = np.linalg.norm(vector)
+        scores = self.matrix @ (vector / norm if norm else vector)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.chunk_ids[i], float(scores[i])) for i in top]
+
+    def add(self, rows: Iterable[Tuple[str, Any]]) -> "CaseVectorIndex":
+        """New index with the given chunks appended; chunk ids already present are replaced"""
+        added = CaseVectorIndex.build(rows, self.matrix.shape[1])
+        if not len(added):
+            return self
+        keep = ~np.isin(self.chunk_ids, added.chunk_ids)
+        return CaseVectorIndex(
+            np.concatenate([self.chunk_ids[keep], added.chunk_ids]),
+            np.vstack([self.matrix[keep], added.matrix]),
+        )
+
+    def remove(self, chunk_ids: Iterable[str]) -> "CaseVectorIndex":
+        keep = ~np.isin(self.chunk_ids, list(chunk_ids))
+        if keep.all():
+            return self
+        return CaseVectorIndex(self.chunk_ids[keep], self.matrix[keep])
+
+
+# Per-case indexes, bounded by case count and total matrix bytes. The TTL bounds staleness when
+# several worker processes ingest into the same case (updates only reach this process's copy).
+case_indexes = LRUCache(
+    settings.VECTOR_MEMORY_INDEX_MAX_CASES,
+    ttl_seconds=settings.VECTOR_MEMORY_INDEX_TTL_SECONDS,
+    max_weight=settings.VECTOR_MEMORY_INDEX_MAX_MB * 1024 * 1024,
+    weigh=lambda index: index.nbytes,
+)
+_lock = threading.Lock()
+# Cases with a Neo4j load in flight: [loads in flight, changes since the first load started].
+# A load that raced with a change is used once but not cached; the entry goes with the last load
+_loading: Dict[str, List[int]] = {}
+
+
+def _bump(case_id: str):
+    # Caller holds _lock
+    state = _loading.get(case_id)
+    if state is not None:
+        state[1] += 1
+
+
+def _end_load(case_id: str) -> int:
+    # Caller holds _lock; returns the case's change count as the load ends
+    state = _loading[case_id]
+    state[0] -= 1
+    if not state[0]:
+        del _loading[case_id]
+    return state[1]
+
+
+def load_case_index(session: Session, user_id: str, case_id: str) -> CaseVectorIndex:
+    """The case's index, loaded from Neo4j on first use and then served from the LRU"""
+    index = case_indexes.get(case_id)
+    if index is not None:
+        return index
+
+    with _lock:
+        state = _loading.setdefault(case_id, [0, 0])
+        state[0] += 1
+        version = state[1]
+    query = """
+    MATCH (u:User {id: $user_id})-[:CREATED]->(c:Case {case_id: $case_id})-[:HAS_EVIDENCE]->(:Evidence)-[:HAS_CHUNK]->(ch:Chunk)
+    WHERE ch.embedding IS NOT NULL
+    RETURN ch.chunk_id as chunk_id, ch.embedding as embedding
+    """
+    try:
+        records = session.run(query, user_id=user_id, case_id=case_id)
+        index = CaseVectorIndex.build(
+            ((record["chunk_id"], record["embedding"]) for record in records),
+            settings.EMBEDDING_DIMENSIONS,
+        )
+    except BaseException:
+        with _lock:
+            _end_load(case_id)
+        raise
+    with _lock:
+        if _end_load(case_id) == version:
+            case_indexes.put(case_id, index)
+    print(f"DEBUG: Loaded in-memory vector index for case {case_id}: {len(index)} chunks, {index.nbytes / 1e6:.1f} MB")
+    return index
+
+
+def add_chunks(case_id: str, rows: Iterable[Tuple[str, Any]]):
+    """Fold newly stored (chunk_id, embedding) pairs into the case's cached index, if it is loaded"""
+    rows = list(rows)
+    with _lock:
+        _bump(case_id)
+        index = case_indexes.peek(case_id)
+        if index is not None:
+            case_indexes.put(case_id, index.add(rows))
+
+
+def remove_chunks(case_id: str, chunk_ids: Iterable[str]):
+    with _lock:
+        _bump(case_id)
+        index = case_indexes.peek(case_id)
+        if index is not None:
+            case_indexes.put(case_id, index.remove(chunk_ids))
+
+
+def invalidate_case(case_id: Optional[str]):
+    """Drop a case's index; the next query reloads it from Neo4j"""
+    if not case_id:
+        return
+    with _lock:
+        _bump(case_id)
+        case_indexes.pop(case_id)
@@ -17,3 +17,21 @@ class ChunkResponse(BaseModel):
     score: float
     timestamp: Optional[str]
     entities: List[Dict[str, Any]]
+
+class IngestionJobResponse(BaseModel):
+    job_id: str
+    case_id: str
+    evidence_id: Optional[str] = None
+    filename: Optional[str] = None
+    file_type: Optional[str] = None
+    status: str  # queued, running, done, failed
+    processed_chunks: int = 0
+    total_chunks: int = 0
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    resumed_from: Optional[str] = None  # job_id of the failed job this one continues
+    parent_job_id: Optional[str] = None  # archive job this member belongs to
+    members: Optional[List["IngestionJobResponse"]] = None  # per-member jobs of an archive upload
+    created_at: Optional[int] = None
+    started_at: Optional[int] = None
+    finished_at: Optional[int] = None
@@ -0,0 +1,126 @@
+"""
+Recall@k and latency of the per-case HNSW index against exact cosine search.
+
+Builds a synthetic clustered embedding set, indexes it with app.rag.ann_index (the same
+code path VECTOR_SEARCH_BACKEND=ann uses), then sweeps ef_search and reports recall@k,
+median query latency and the speedup over the exact in-memory NumPy index. Also times a
+save/load round trip through ANN_INDEX_DIR.
+
+Exits 1 if recall at the configured ANN_EF_SEARCH is below --min-recall.
+
+Usage (from nexustrace-backend/):
+    python -m benchmarks.ann_recall --chunks 200000 --queries 200 --k 10 --ef 16,32,64,128,256
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.core.config import settings  # noqa: E402
+from app.rag import ann_index  # noqa: E402
+from app.rag.vector_index import CaseVectorIndex  # noqa: E402
+
+
+def synthetic_embeddings(count: int, dimensions: int, clusters: int, seed: int = 7) -> np.ndarray:
+    # Chunks of one case cluster by topic/source; uniform random vectors would overstate ANN difficulty
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=count)
+    vectors = centers[assignment] + 0.6 * rng.standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def queries_near(vectors: np.ndarray, count: int, seed: int = 13) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), size=count)]
+    noisy = picks + 0.3 * rng.standard_normal(picks.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    return noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+
+def timed_searches(search, queries, k):
+    results = []
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        results.append([chunk_id for chunk_id, _ in search(query, k)])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return results, statistics.median(latencies)
+
+
+def recall_at_k(approximate, exact, k):
+    hits = sum(len(set(a[:k]) & set(e[:k])) for a, e in zip(approximate, exact))
+    return hits / (k * len(exact))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--dimensions", type=int, default=settings.EMBEDDING_DIMENSIONS)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", default="16,32,64,128,256", help="Comma-separated ef_search values to sweep")
+    parser.add_argument("--min-recall", type=float, default=None, help="Fail if recall@k at ANN_EF_SEARCH is lower")
+    args = parser.parse_args()
+
+    if ann_index._get_hnswlib() is None:
+        print("hnswlib is not installed (pip install hnswlib); nothing to benchmark.")
+        return 1
+    settings.EMBEDDING_DIMENSIONS = args.dimensions
+
+    vectors = synthetic_embeddings(args.chunks, args.dimensions, args.clusters)
+    chunk_ids = [f"chunk-{i}" for i in range(args.chunks)]
+    queries = queries_near(vectors, args.queries)
+    print(f"chunks: {args.chunks:,}  dim: {args.dimensions}  queries: {args.queries}  k: {args.k}  M: {settings.ANN_M}  ef_construction: {settings.ANN_EF_CONSTRUCTION}")
+
+    exact = CaseVectorIndex(chunk_ids, vectors)
+    exact_results, exact_ms = timed_searches(exact.search, queries, args.k)
+
+    started = time.perf_counter()
+    index = ann_index.build_index(chunk_ids, vectors)
+    build_seconds = time.perf_counter() - started
+    print(f"exact search: {exact_ms:.2f} ms/query   HNSW build: {build_seconds:.1f}s ({args.chunks / build_seconds:,.0f} chunks/s)")
+
+    ef_values = sorted({int(value) for value in args.ef.split(",") if value.strip()} | {settings.ANN_EF_SEARCH})
+    configured_ef = settings.ANN_EF_SEARCH
+    configured_recall = None
+    print(f"{'ef_search':>9} {'recall@' + str(args.k):>10} {'ms/query':>9} {'speedup':>8}")
+    for ef in ef_values:
+        settings.ANN_EF_SEARCH = ef
+        results, ann_ms = timed_searches(index.search, queries, args.k)
+        recall = recall_at_k(results, exact_results, args.k)
+        marker = "  <- ANN_EF_SEARCH" if ef == configured_ef else ""
+        print(f"{ef:>9} {recall:>10.4f} {ann_ms:>9.3f} {exact_ms / max(ann_ms, 1e-9):>7.1f}x{marker}")
+        if ef == configured_ef:
+            configured_recall = recall
+    settings.ANN_EF_SEARCH = configured_ef
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings.ANN_INDEX_DIR = directory
+        started = time.perf_counter()
+        index.save("benchmark")
+        saved = time.perf_counter() - started
+        size_mb = sum(os.path.getsize(path) for path in ann_index._index_paths("benchmark")) / 1e6
+        started = time.perf_counter()
+        loaded = ann_index.CaseAnnIndex.load("benchmark")
+        load_seconds = time.perf_counter() - started
+        reloaded, _ = timed_searches(loaded.search, queries[:20], args.k)
+        same = reloaded == timed_searches(index.search, queries[:20], args.k)[0]
+        print(f"persisted: {size_mb:.1f} MB, save {saved:.2f}s, load {load_seconds:.2f}s, reloaded results identical: {same}")
+
+    if args.min_recall is not None and configured_recall < args.min_recall:
+        print(f"RECALL FAILED: recall@{args.k} {configured_recall:.4f} < {args.min_recall} at ef_search={configured_ef}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
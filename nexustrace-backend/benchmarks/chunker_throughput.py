@@ -0,0 +1,95 @@
+"""
+Micro-benchmark: legacy list-building chunker vs the streaming chunker on synthetic PDF text.
+
+The legacy implementation recomputed the character position of every chunk with
+len(" ".join(tokens[:start])), which is quadratic in document length.
+
+Usage (from nexustrace-backend/):
+    python -m benchmarks.chunker_throughput --pages 500 --words-per-page 450
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.core.config import settings  # noqa: E402
+from app.ingestion.chunker import chunk_text, extract_timestamp  # noqa: E402
+
+VOCABULARY = [
+    "login", "failed", "admin", "transfer", "10.0.4.17", "report", "2024-02-15T14:30:00Z",
+    "user", "process", "explorer.exe", "session", "network", "policy", "export", "alice.chen",
+]
+
+
+def synthetic_pdf(pages: int, words_per_page: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    page_map = {}
+    full_text = ""
+    for page_number in range(1, pages + 1):
+        lines = []
+        for _ in range(words_per_page // 15):
+            lines.append(" ".join(rng.choice(VOCABULARY) for _ in range(15)))
+        page_text = "\n".join(lines)
+        page_map[page_number] = page_text
+        full_text += page_text + "\n"
+    return {"text": full_text, "pages": page_map, "total_pages": pages, "file_type": "pdf", "filename": "synthetic.pdf"}
+
+
+def legacy_chunk_text(text: str, evidence_id: str, metadata: dict):
+    tokens = text.split()
+    chunk_size = settings.MAX_CHUNK_TOKENS
+    overlap = settings.CHUNK_OVERLAP
+    chunks = []
+    start = 0
+    chunk_index = 0
+    while start < len(tokens):
+        chunk_text_str = " ".join(tokens[start:start + chunk_size])
+        timestamp = extract_timestamp(chunk_text_str)
+        page_number = None
+        char_position = len(" ".join(tokens[:start]))
+        cumulative = 0
+        for pg_num, pg_text in metadata["pages"].items():
+            cumulative += len(pg_text)
+            if char_position < cumulative:
+                page_number = pg_num
+                break
+        chunks.append({"chunk_index": chunk_index, "text": chunk_text_str, "timestamp": timestamp, "page_number": page_number})
+        chunk_index += 1
+        start += chunk_size - overlap
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--words-per-page", type=int, default=450)
+    args = parser.parse_args()
+
+    doc = synthetic_pdf(args.pages, args.words_per_page)
+    print(f"text: {len(doc['text']):,} chars, {args.pages} pages")
+
+    start = time.perf_counter()
+    legacy = legacy_chunk_text(doc["text"], "bench", doc)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    streamed = list(chunk_text(doc["text"], "bench", metadata=doc))
+    streamed_s = time.perf_counter() - start
+
+    assert [c["text"] for c in legacy] == [c["text"] for c in streamed]
+    same_pages = sum(1 for a, b in zip(legacy, streamed) if a["page_number"] == b["page_number"])
+
+    print(f"chunks:     {len(streamed)}")
+    print(f"legacy:     {legacy_s:8.3f}s")
+    print(f"streaming:  {streamed_s:8.3f}s")
+    print(f"speedup:    {legacy_s / streamed_s:8.2f}x")
+    print(f"page agreement with legacy estimate: {same_pages}/{len(streamed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Compare embedding backends (torch, onnx, onnx-int8) on load time, query latency,
+batch throughput and cosine parity with the torch reference vectors.
+
+Chunks come from the bundled *_ENDPOINT_LOG.txt samples; query latency is measured
+with single-text encode() calls, the way get_embedding() embeds a question.
+Exits 1 if any backend's minimum per-chunk cosine against torch is below the threshold.
+
+Usage (from nexustrace-backend/):
+    python -m benchmarks.embedding_backends --backends torch,onnx,onnx-int8 --repeat 3
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.ai.embeddings import EMBEDDING_BACKENDS, create_embedding_model  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.ingestion.chunker import chunk_text  # noqa: E402
+
+QUESTIONS = [
+    "Who logged in to the domain controller after midnight?",
+    "Which hosts contacted the external IP address?",
+    "Was any data copied to a USB device?",
+    "List failed authentication attempts for the admin account",
+    "When was the scheduled task created?",
+]
+
+
+def load_sample_chunks(repeat: int):
+    chunks = []
+    for path in sorted(BACKEND_ROOT.glob("*_ENDPOINT_LOG.txt")):
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        for chunk in chunk_text(text, evidence_id=path.stem, metadata={"filename": path.name, "file_type": "txt"}):
+            chunks.append(chunk["text"])
+    return chunks * repeat
+
+
+def encode(model, texts, batch_size):
+    return model.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    ).astype(np.float32, copy=False)
+
+
+def measure_backend(backend: str, texts, batch_size: int, query_rounds: int):
+    started = time.perf_counter()
+    model = create_embedding_model(backend)
+    load_seconds = time.perf_counter() - started
+
+    # Warm up so session/graph initialisation is not counted
+    encode(model, texts[:batch_size], batch_size)
+    model.encode(QUESTIONS[0])
+
+    latencies = []
+    for _ in range(query_rounds):
+        for question in QUESTIONS:
+            started = time.perf_counter()
+            model.encode(question)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    vectors = encode(model, texts, batch_size)
+    batch_seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "load_seconds": load_seconds,
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "chunks_per_second": len(texts) / batch_seconds if batch_seconds else float("inf"),
+        "vectors": vectors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(EMBEDDING_BACKENDS), help="Comma-separated backends to compare")
+    parser.add_argument("--repeat", type=int, default=3, help="Replicate the sample chunks N times")
+    parser.add_argument("--batch-size", type=int, default=None, help="encode() batch size (default: EMBEDDING_BATCH_SIZE)")
+    parser.add_argument("--query-rounds", type=int, default=20, help="Passes over the sample questions for latency")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Parity threshold for the fp32 onnx backend")
+    parser.add_argument("--min-cosine-int8", type=float, default=0.97, help="Parity threshold for onnx-int8")
+    args = parser.parse_args()
+
+    backends = [name.strip().lower() for name in args.backends.split(",") if name.strip()]
+    if "torch" not in backends:
+        backends.insert(0, "torch")  # parity reference
+    batch_size = args.batch_size or settings.EMBEDDING_BATCH_SIZE
+
+    texts = load_sample_chunks(args.repeat)
+    if not texts:
+        print(f"No *_ENDPOINT_LOG.txt samples found in {BACKEND_ROOT}")
+        return 1
+    print(f"model: {settings.EMBEDDING_MODEL}  chunks: {len(texts)}  batch size: {batch_size}")
+
+    results = {}
+    for backend in backends:
+        try:
+            results[backend] = measure_backend(backend, texts, batch_size, args.query_rounds)
+        except Exception as e:
+            print(f"{backend:<10} unavailable: {e}")
+    if "torch" not in results:
+        print("torch reference backend failed to load; cannot check parity.")
+        return 1
+
+    reference = results["torch"]["vectors"]
+    failed = []
+    print(f"{'backend':<10} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'chunks/s':>9} {'min cos':>8} {'mean cos':>9}")
+    for backend, result in results.items():
+        # Both sides are L2-normalized, so the row-wise dot product is the cosine
+        cosines = np.sum(result["vectors"] * reference, axis=1)
+        min_cos, mean_cos = float(cosines.min()), float(cosines.mean())
+        print(
+            f"{backend:<10} {result['load_seconds']:7.2f} {result['query_p50_ms']:8.2f} {result['query_p95_ms']:8.2f} "
+            f"{result['chunks_per_second']:9.1f} {min_cos:8.4f} {mean_cos:9.4f}"
+        )
+        threshold = args.min_cosine_int8 if backend == "onnx-int8" else args.min_cosine
+        if backend != "torch" and min_cos < threshold:
+            failed.append(f"{backend}: min cosine {min_cos:.4f} < {threshold}")
+
+    for backend in results:
+        if backend != "torch":
+            speedup = results["torch"]["query_p50_ms"] / max(results[backend]["query_p50_ms"], 1e-9)
+            print(f"{backend} query speedup vs torch: {speedup:.2f}x")
+
+    if failed:
+        print("PARITY FAILED: " + "; ".join(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
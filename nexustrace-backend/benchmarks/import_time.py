@@ -0,0 +1,87 @@
+"""
+Import-time regression check for the FastAPI app.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter, reports the
+cumulative import time and the slowest packages, and exits 1 if a heavy
+dependency that should only load on first use was imported, or the total exceeds --max-ms.
+
+Usage (from nexustrace-backend/):
+    python -m benchmarks.import_time --max-ms 1500 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+
+# Packages that must not be imported just by importing app.main
+LAZY_MODULES = ("sentence_transformers", "torch", "transformers", "onnxruntime", "openai", "pypdf", "requests", "pytesseract", "PIL")
+
+# Settings without defaults; placeholders let the import run where no .env exists
+REQUIRED_ENV = ("SECRET_KEY", "NEO4J_URI", "NEO4J_USER", "NEO4J_PASSWORD", "OPENAI_API_KEY")
+
+
+def run_importtime(module: str):
+    env = dict(os.environ)
+    if not (BACKEND_ROOT / ".env").exists():
+        for name in REQUIRED_ENV:
+            env.setdefault(name, "import-time-check")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(BACKEND_ROOT),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        rows.append({"module": name.strip(), "self_us": self_us, "cumulative_us": cumulative_us})
+    return proc.returncode, proc.stderr, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the cumulative import time exceeds this")
+    parser.add_argument("--top", type=int, default=15, help="Show the N packages with the most import time")
+    args = parser.parse_args()
+
+    returncode, stderr, rows = run_importtime(args.module)
+    if returncode != 0:
+        print(f"import {args.module} failed:")
+        print("\n".join(line for line in stderr.splitlines() if not line.startswith("import time:")))
+        return 1
+
+    total = next((row for row in rows if row["module"] == args.module), None)
+    total_ms = total["cumulative_us"] / 1000 if total else sum(row["self_us"] for row in rows) / 1000
+    # Self time summed per top-level package shows where the cost lives, however deeply it was imported
+    packages = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + row["self_us"]
+
+    print(f"import {args.module}: {total_ms:.0f} ms cumulative, {len(rows)} modules")
+    for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    failures = []
+    imported = {row["module"].split(".")[0] for row in rows}
+    eager = [name for name in LAZY_MODULES if name in imported]
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if args.max_ms is not None and total_ms > args.max_ms:
+        failures.append(f"{total_ms:.0f} ms > budget {args.max_ms:.0f} ms")
+    if failures:
+        print("IMPORT-TIME CHECK FAILED: " + "; ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+End-to-end ingestion benchmark: parse -> chunk -> NER -> risk -> embed -> graph write.
+
+Runs the real IngestionService pipeline on the bundled sample evidence (Case-1.pdf,
+Case-2.txt, *_ENDPOINT_LOG.txt) and on synthetic logs scaled up from the endpoint
+logs, with GraphBuilder swapped for an in-memory recording stub so no Neo4j is needed.
+Emits a JSON report with per-input, per-stage timings (and traced memory with
+--trace-memory); --baseline compares against an earlier report and exits 1 on regressions.
+
+Usage (from nexustrace-backend/):
+    python -m benchmarks.ingestion_pipeline --scale-mb 5 --output bench.json
+    python -m benchmarks.ingestion_pipeline --baseline bench.json --max-regression 1.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.core.config import settings  # noqa: E402
+from app.ai import embeddings, nlp  # noqa: E402
+from app.ingestion import service as ingestion_service  # noqa: E402
+from app.ingestion.parsers import parse_path  # noqa: E402
+
+STAGES = ["parse", "chunk", "dedup_lookup", "ner", "risk", "embed", "graph_write"]
+SETTINGS_SNAPSHOT = [
+    "MAX_CHUNK_TOKENS", "CHUNK_OVERLAP", "LOG_CHUNKING_MODE", "CSV_CHUNK_ROWS", "JSON_CHUNK_RECORDS",
+    "EMBEDDING_MODEL", "EMBEDDING_BATCH_SIZE", "SPACY_MODEL", "NER_BATCH_SIZE", "NER_N_PROCESS",
+    "INGESTION_WINDOW_CHUNKS", "PDF_EXTRACT_WORKERS", "PDF_PARALLEL_MIN_PAGES",
+]
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class StageRecorder:
+    """Accumulates wall time, call/item counts and (optionally) traced peak memory per stage"""
+
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    def _stage(self, name: str) -> dict:
+        return self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "items": 0, "peak_mb": 0.0})
+
+    def _start(self):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()[0]
+        return 0
+
+    def _stop(self, name: str, started: float, base_memory: int, items: int = 0):
+        stage = self._stage(name)
+        stage["seconds"] += time.perf_counter() - started
+        stage["calls"] += 1
+        stage["items"] += items
+        if self.trace_memory:
+            peak = (tracemalloc.get_traced_memory()[1] - base_memory) / 1e6
+            stage["peak_mb"] = max(stage["peak_mb"], peak)
+
+    def wrap(self, name: str, fn, count_items=None):
+        def timed(*args, **kwargs):
+            base_memory = self._start()
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            self._stop(name, started, base_memory, count_items(args, result) if count_items else 0)
+            return result
+        return timed
+
+    def wrap_iter(self, name: str, fn):
+        """Time a generator factory: only the work done inside each next() counts toward the stage"""
+        def timed(*args, **kwargs):
+            iterator = iter(fn(*args, **kwargs))
+            while True:
+                base_memory = self._start()
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    self._stop(name, started, base_memory)
+                    return
+                self._stop(name, started, base_memory, 1)
+                yield item
+        return timed
+
+    def report(self) -> dict:
+        return {
+            name: {
+                "seconds": round(stage["seconds"], 4),
+                "calls": stage["calls"],
+                "items": stage["items"],
+                **({"peak_mb": round(stage["peak_mb"], 2)} if self.trace_memory else {}),
+            }
+            for name, stage in sorted(self.stages.items(), key=lambda kv: STAGES.index(kv[0]) if kv[0] in STAGES else len(STAGES))
+        }
+
+
+class RecordingGraphBuilder:
+    """In-memory stand-in for GraphBuilder: records what ingestion would write, never touches Neo4j"""
+
+    def __init__(self):
+        self.evidence = {}
+        self.chunk_rows = 0
+        self.mention_rows = 0
+        self.known = {}
+
+    def create_evidence_node(self, user_id, case_id, evidence_id, filename, file_type, content_hash=None):
+        self.evidence[evidence_id] = {"status": "processing", "chunks_committed": 0, "case_id": case_id, "content_hash": content_hash}
+        return {"evidence_id": evidence_id}
+
+    def get_evidence_checkpoint(self, evidence_id):
+        return self.evidence.get(evidence_id)
+
+    def set_evidence_checkpoint(self, evidence_id, chunks_committed):
+        self.evidence[evidence_id]["chunks_committed"] = chunks_committed
+
+    def set_evidence_status(self, evidence_id, status):
+        self.evidence[evidence_id]["status"] = status
+
+    def find_chunks_by_text_hash(self, user_id, text_hashes):
+        return {h: self.known[h] for h in text_hashes if h in self.known}
+
+    def store_chunks_bulk(self, case_id, evidence_id, processed, batch_size=None):
+        for item in processed:
+            # Chunks whose triage failed carry no text_hash and are never offered for reuse
+            if item["chunk"].get("text_hash"):
+                self.known.setdefault(item["chunk"]["text_hash"], {
+                    "embedding": item["embedding"],
+                    "risk_score": item["risk_score"],
+                    "entities": item["entities"],
+                })
+            self.chunk_rows += 1
+            self.mention_rows += len(item["entities"] or [])
+        return {"batches": [], "stages": {}}
+
+
+def sample_inputs():
+    names = ["Case-1.pdf", "Case-2.txt"] + sorted(p.name for p in BACKEND_ROOT.glob("*_ENDPOINT_LOG.txt"))
+    return [BACKEND_ROOT / name for name in names if (BACKEND_ROOT / name).exists()]
+
+
+def write_scaled_log(target_mb: float) -> Path:
+    """Endpoint log lines repeated until target_mb, each copy shifted by a day so chunks do not dedup"""
+    lines = []
+    for path in sorted(BACKEND_ROOT.glob("*_ENDPOINT_LOG.txt")):
+        lines.extend(line for line in path.read_text(encoding="utf-8", errors="ignore").splitlines() if line.strip())
+    if not lines:
+        raise SystemExit(f"No *_ENDPOINT_LOG.txt samples found in {BACKEND_ROOT}")
+
+    def shift(match, days):
+        return (datetime.strptime(match.group(0), "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
+
+    fd, name = tempfile.mkstemp(prefix="nexustrace-bench-", suffix=".log")
+    target = int(target_mb * 1e6)
+    written = 0
+    copy = 0
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        while written < target:
+            for line in lines:
+                out = _DATE_RE.sub(lambda m: shift(m, copy), line) + "\n"
+                f.write(out)
+                written += len(out)
+            copy += 1
+    return Path(name)
+
+
+def instrument(recorder: StageRecorder):
+    """Swap the pipeline functions IngestionService calls for timed wrappers"""
+    svc = ingestion_service
+    svc.extract_entities_batch = recorder.wrap("ner", nlp.extract_entities_batch, lambda args, result: len(result))
+    svc.calculate_risk_score = recorder.wrap("risk", svc.calculate_risk_score, lambda args, result: 1)
+    svc.get_embeddings = recorder.wrap("embed", embeddings.get_embeddings, lambda args, result: len(result))
+    for name in ["chunk_segments", "chunk_log_segments", "chunk_records"]:
+        setattr(svc, name, recorder.wrap_iter("chunk", getattr(svc, name)))
+
+
+def run_input(path: Path, trace_memory: bool, name: str = None) -> dict:
+    originals = {attribute: getattr(ingestion_service, attribute) for attribute in [
+        "extract_entities_batch", "calculate_risk_score", "get_embeddings",
+        "chunk_segments", "chunk_log_segments", "chunk_records",
+    ]}
+    recorder = StageRecorder(trace_memory)
+    instrument(recorder)
+    graph = RecordingGraphBuilder()
+    graph.find_chunks_by_text_hash = recorder.wrap("dedup_lookup", graph.find_chunks_by_text_hash)
+    graph.store_chunks_bulk = recorder.wrap("graph_write", graph.store_chunks_bulk, lambda args, result: len(args[2]))
+    service = ingestion_service.IngestionService(session=None, user_id="bench", graph_builder=graph)
+
+    file_type = path.name.rsplit(".", 1)[-1].lower()
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            parsed = recorder.wrap("parse", parse_path)(str(path), file_type, path.name)
+            result = service.ingest("bench-case", f"bench-{path.stem}", parsed)
+    finally:
+        elapsed = time.perf_counter() - started
+        if trace_memory:
+            tracemalloc.stop()
+        for attribute, fn in originals.items():
+            setattr(ingestion_service, attribute, fn)
+
+    stages = recorder.report()
+    # Token/record counting passes and window bookkeeping are not wrapped; keep their share visible
+    stages["unattributed"] = {"seconds": round(max(0.0, elapsed - sum(stage["seconds"] for stage in stages.values())), 4)}
+    return {
+        "name": name or path.name,
+        "bytes": path.stat().st_size,
+        "chunks": result["chunks"],
+        "chunk_mode": result.get("chunk_mode"),
+        "seconds": round(elapsed, 4),
+        "chunks_per_second": round(result["chunks"] / elapsed, 2) if elapsed else None,
+        "mb_per_second": round(path.stat().st_size / 1e6 / elapsed, 3) if elapsed else None,
+        "dedup_hit_rate": result["dedup"]["hit_rate"],
+        "graph": {"chunk_rows": graph.chunk_rows, "mention_rows": graph.mention_rows},
+        "stages": stages,
+    }
+
+
+def load_models() -> dict:
+    timings = {}
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        nlp.load_nlp_model()
+    timings["spacy_seconds"] = round(time.perf_counter() - started, 3)
+    timings["spacy_loaded"] = nlp.nlp_model is not None
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        embeddings.load_embedding_model()
+    timings["embedding_seconds"] = round(time.perf_counter() - started, 3)
+    return timings
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(report: dict, baseline: dict, max_regression: float, min_seconds: float) -> list:
+    """Stages whose time grew by more than max_regression x against the baseline report"""
+    base_inputs = {item["name"]: item for item in baseline.get("inputs", [])}
+    regressions = []
+    for item in report["inputs"]:
+        base = base_inputs.get(item["name"])
+        if not base:
+            continue
+        pairs = [("total", item["seconds"], base["seconds"])]
+        pairs += [
+            (stage, data["seconds"], base["stages"][stage]["seconds"])
+            for stage, data in item["stages"].items()
+            if stage in base.get("stages", {})
+        ]
+        for stage, current, previous in pairs:
+            if previous >= min_seconds and current / previous > max_regression:
+                regressions.append({
+                    "input": item["name"],
+                    "stage": stage,
+                    "baseline_seconds": previous,
+                    "seconds": current,
+                    "ratio": round(current / previous, 3),
+                })
+    return regressions
+
+
+def print_summary(report: dict, out):
+    for item in report["inputs"]:
+        print(f"{item['name']:<32} {item['chunks']:>6} chunks {item['seconds']:8.2f}s {item['chunks_per_second'] or 0:8.1f} chunks/s", file=out)
+        for stage, data in item["stages"].items():
+            memory = f"  peak {data['peak_mb']:7.1f} MB" if "peak_mb" in data else ""
+            calls = f"  {data['calls']:>6} calls" if "calls" in data else ""
+            print(f"    {stage:<14} {data['seconds']:8.3f}s{calls}{memory}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale-mb", type=float, default=5.0, help="Size of the synthetic scaled-up log (0 to skip)")
+    parser.add_argument("--skip-samples", action="store_true", help="Only run the synthetic log")
+    parser.add_argument("--trace-memory", action="store_true", help="Record per-stage traced peak memory (slower)")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.25, help="Allowed slowdown ratio per stage")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Ignore stages faster than this in the baseline")
+    args = parser.parse_args()
+
+    models = load_models()
+    inputs = [] if args.skip_samples else sample_inputs()
+    scaled = write_scaled_log(args.scale_mb) if args.scale_mb > 0 else None
+    if scaled:
+        inputs.append(scaled)
+
+    try:
+        # The synthetic log gets a stable name so reports from different runs line up
+        results = [
+            run_input(path, args.trace_memory, f"synthetic-{args.scale_mb:g}MB.log" if path == scaled else None)
+            for path in inputs
+        ]
+    finally:
+        if scaled:
+            os.remove(scaled)
+
+    report = {
+        "meta": {
+            "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "models": models,
+            "settings": {name: getattr(settings, name) for name in SETTINGS_SNAPSHOT},
+        },
+        "inputs": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["regressions"] = compare(report, json.load(f), args.max_regression, args.min_seconds)
+        exit_code = 1 if report["regressions"] else 0
+
+    print_summary(report, sys.stderr if not args.output else sys.stdout)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+        print(f"report written to {args.output}")
+    else:
+        print(payload)
+    for regression in report.get("regressions", []):
+        print(f"REGRESSION {regression['input']} {regression['stage']}: {regression['baseline_seconds']}s -> {regression['seconds']}s ({regression['ratio']}x)", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
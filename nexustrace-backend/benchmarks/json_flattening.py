@@ -0,0 +1,124 @@
+"""
+Compare the legacy indent=2 JSON rendering with streaming key=value flattening.
+
+Reports chunk counts, tokens to embed and peak Python memory (tracemalloc) for a
+synthetic endpoint-event export, written as a JSON array, as NDJSON and as one large
+top-level object ({"export": ..., "events": [...]}). For the single object it also
+compares the streaming decode time with json.load, which should stay within a small
+constant factor as --records grows (decoding must not be quadratic in the object size).
+
+Usage (from nexustrace-backend/):
+    python -m benchmarks.json_flattening --records 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.ingestion.chunker import chunk_records, chunk_text  # noqa: E402
+from app.ingestion.parsers import iter_json_records, iter_json_values  # noqa: E402
+
+USERS = ["alice.chen", "bob.ortiz", "svc_backup", "admin"]
+ACTIONS = ["login", "logout", "file_read", "process_start", "dns_query", "usb_mount"]
+
+
+def synthetic_events(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "timestamp": f"2024-02-15T{(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}Z",
+            "host": {"name": f"WS-{rng.randint(1, 40):03d}", "ip": f"10.0.{rng.randint(0, 9)}.{rng.randint(2, 254)}"},
+            "user": rng.choice(USERS),
+            "action": rng.choice(ACTIONS),
+            "process": {"name": "explorer.exe", "pid": rng.randint(100, 9000)},
+            "tags": ["endpoint", "edr"],
+        }
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = 0
+    tokens = 0
+    for chunk in fn():
+        chunks += 1
+        tokens += len(chunk["text"].split())
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chunks, tokens, elapsed, peak
+
+
+def legacy_chunks(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return chunk_text(json.dumps(data, indent=2), "bench", metadata={"file_type": "json"})
+
+
+def streaming_chunks(path: str):
+    return chunk_records(iter_json_records(path), "bench", metadata={"file_type": "json"})
+
+
+def decode_seconds(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def report(label: str, result):
+    chunks, tokens, elapsed, peak = result
+    print(f"{label:<18} {chunks:>7} chunks {tokens:>10,} tokens {elapsed:8.2f}s  peak {peak / 1e6:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    events = list(synthetic_events(args.records))
+    fd, array_path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(events, f)
+    fd, ndjson_path = tempfile.mkstemp(suffix=".ndjson")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+    fd, object_path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"export": {"tool": "edr", "records": len(events)}, "events": events}, f)
+    del events
+
+    try:
+        print(f"records: {args.records:,}  file: {os.path.getsize(array_path) / 1e6:.1f} MB")
+        legacy = measure(lambda: legacy_chunks(array_path))
+        array = measure(lambda: streaming_chunks(array_path))
+        ndjson = measure(lambda: streaming_chunks(ndjson_path))
+        single_object = measure(lambda: streaming_chunks(object_path))
+        report("legacy indent=2", legacy)
+        report("streaming array", array)
+        report("streaming ndjson", ndjson)
+        report("streaming object", single_object)
+        print(f"chunk reduction:   {legacy[0] / max(array[0], 1):8.2f}x")
+        print(f"peak memory ratio: {legacy[3] / max(array[3], 1):8.2f}x")
+        
+        streamed = decode_seconds(lambda: sum(1 for _ in iter_json_values(object_path)))
+        with open(object_path, "r", encoding="utf-8") as f:
+            loaded = decode_seconds(lambda: json.load(f))
+        print(f"single object decode: streaming {streamed:.2f}s, json.load {loaded:.2f}s ({streamed / max(loaded, 1e-9):.1f}x)")
+    finally:
+        os.remove(array_path)
+        os.remove(ndjson_path)
+        os.remove(object_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
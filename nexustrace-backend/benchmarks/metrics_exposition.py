@@ -0,0 +1,121 @@
+"""
+Exposition-format check for the dependency-free /metrics exporter.
+
+app.core.metrics renders the Prometheus text format itself instead of depending on
+prometheus_client. This records known values into one metric of each kind, using awkward
+label values and help text (quotes, backslashes, newlines, non-ASCII, infinities), parses the
+rendered output with prometheus_client's own exposition parser and compares every sample with
+what was recorded. The application registry served on GET /metrics is parsed as well.
+
+Exits 1 if the output does not parse or a sample differs (requires pip install prometheus_client).
+
+Usage (from nexustrace-backend/):
+    python -m benchmarks.metrics_exposition
+"""
+import argparse
+import math
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.core.metrics import REGISTRY, Counter, Gauge, Histogram, MetricsRegistry, StageTimings  # noqa: E402
+
+AWKWARD_LABEL = 'quote " backslash \\ newline \n unicode é'
+
+
+def recorded_registry():
+    """A registry with one populated metric of each kind and the samples it must expose"""
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("check_events_total", "Events with a \\ backslash and a\nnewline in the help.", ["source"]))
+    gauge = registry.register(Gauge("check_depth", "Gauge going negative and infinite.", ["kind"]))
+    histogram = registry.register(Histogram("check_seconds", "Histogram with an awkward label.", ["stage"], buckets=(0.01, 1.0)))
+    plain = registry.register(Counter("check_plain_total", "Counter without labels."))
+
+    counter.inc(3, source=AWKWARD_LABEL)
+    counter.inc(0.5, source="plain")
+    gauge.set(-2.5, kind="negative")
+    gauge.set(math.inf, kind="unbounded")
+    for value in (0.003, 0.2, 400.0):
+        histogram.observe(value, stage=AWKWARD_LABEL)
+    plain.inc()
+
+    expected = {
+        ("check_events_total", (("source", AWKWARD_LABEL),)): 3.0,
+        ("check_events_total", (("source", "plain"),)): 0.5,
+        ("check_depth", (("kind", "negative"),)): -2.5,
+        ("check_depth", (("kind", "unbounded"),)): math.inf,
+        ("check_seconds_bucket", (("le", "0.01"), ("stage", AWKWARD_LABEL))): 1.0,
+        ("check_seconds_bucket", (("le", "1.0"), ("stage", AWKWARD_LABEL))): 2.0,
+        ("check_seconds_bucket", (("le", "+Inf"), ("stage", AWKWARD_LABEL))): 3.0,
+        ("check_seconds_sum", (("stage", AWKWARD_LABEL),)): 400.203,
+        ("check_seconds_count", (("stage", AWKWARD_LABEL),)): 3.0,
+        ("check_plain_total", ()): 1.0,
+    }
+    return registry, expected
+
+
+def parse(text: str):
+    from prometheus_client.parser import text_string_to_metric_families
+
+    families = list(text_string_to_metric_families(text))
+    samples = {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in families
+        for sample in family.samples
+    }
+    return families, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    try:
+        import prometheus_client  # noqa: F401
+    except ImportError:
+        print("prometheus_client is not installed (pip install prometheus_client); nothing to check.")
+        return 1
+
+    failures = []
+    registry, expected = recorded_registry()
+    try:
+        families, samples = parse(registry.render())
+    except ValueError as e:
+        print(f"EXPOSITION FAILED: recorded registry does not parse: {e}")
+        return 1
+    for key, value in expected.items():
+        if key not in samples:
+            failures.append(f"missing sample {key}")
+        elif not math.isclose(samples[key], value):
+            failures.append(f"{key}: parsed {samples[key]!r}, recorded {value!r}")
+    for key in samples.keys() - expected.keys():
+        failures.append(f"unexpected sample {key}")
+    documentation = {family.name: family.documentation for family in families}
+    if documentation.get("check_events") != "Events with a \\ backslash and a\nnewline in the help.":
+        failures.append(f"help text did not round-trip: {documentation.get('check_events')!r}")
+    print(f"recorded registry: {len(families)} families, {len(samples)} samples parsed")
+
+    # The application registry as served on GET /metrics, with at least one observed stage
+    StageTimings().record("parse", 0.01)
+    try:
+        app_families, app_samples = parse(REGISTRY.render())
+    except ValueError as e:
+        print(f"EXPOSITION FAILED: application registry does not parse: {e}")
+        return 1
+    if len(app_families) != len(REGISTRY._metrics):
+        failures.append(f"application registry: {len(app_families)} families parsed, {len(REGISTRY._metrics)} registered")
+    print(f"application registry: {len(app_families)} families, {len(app_samples)} samples parsed")
+
+    if failures:
+        print("EXPOSITION FAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("exposition OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
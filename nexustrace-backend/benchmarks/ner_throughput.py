@@ -0,0 +1,77 @@
+"""
+Compare per-chunk and batched (nlp.pipe) entity extraction throughput.
+
+Runs against the bundled *_ENDPOINT_LOG.txt samples in the backend root.
+
+Usage (from nexustrace-backend/):
+    python -m benchmarks.ner_throughput --repeat 3 --batch-size 64 --n-process 1
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.ai import nlp  # noqa: E402
+from app.ingestion.chunker import chunk_text  # noqa: E402
+
+
+def load_sample_chunks(repeat: int):
+    chunks = []
+    for path in sorted(BACKEND_ROOT.glob("*_ENDPOINT_LOG.txt")):
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        for chunk in chunk_text(text, evidence_id=path.stem, metadata={"filename": path.name, "file_type": "txt"}):
+            chunks.append(chunk["text"])
+    return chunks * repeat
+
+
+def timed(fn):
+    # The extractors print per call; keep that out of the measurement.
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Replicate the sample chunks N times")
+    parser.add_argument("--batch-size", type=int, default=None, help="nlp.pipe batch size (default: NER_BATCH_SIZE)")
+    parser.add_argument("--n-process", type=int, default=None, help="nlp.pipe worker processes (default: NER_N_PROCESS)")
+    args = parser.parse_args()
+
+    nlp.load_nlp_model()
+    if nlp.nlp_model is None:
+        print("spaCy model unavailable; only regex extraction would be measured.")
+        return 1
+
+    texts = load_sample_chunks(args.repeat)
+    if not texts:
+        print(f"No *_ENDPOINT_LOG.txt samples found in {BACKEND_ROOT}")
+        return 1
+
+    # Warm up both paths so model initialisation is not counted.
+    timed(lambda: nlp.extract_entities(texts[0]))
+    timed(lambda: nlp.extract_entities_batch(texts[:1]))
+
+    single, single_s = timed(lambda: [nlp.extract_entities(t) for t in texts])
+    batched, batched_s = timed(
+        lambda: nlp.extract_entities_batch(texts, batch_size=args.batch_size, n_process=args.n_process)
+    )
+
+    single_count = sum(len(e) for e in single)
+    batched_count = sum(len(e) for e in batched)
+    print(f"chunks:     {len(texts)}")
+    print(f"per-chunk:  {single_s:8.3f}s  {len(texts) / single_s:8.1f} chunks/s  {single_count} entities")
+    print(f"batched:    {batched_s:8.3f}s  {len(texts) / batched_s:8.1f} chunks/s  {batched_count} entities")
+    print(f"speedup:    {single_s / batched_s:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -61,14 +61,14 @@ export default function EvidenceUpload({ caseId }: { caseId: string }) {
                 Click to upload or drag and drop
               </p>
               <p className="mt-1 text-xs text-muted-foreground">
-                PDF, TXT, MD or DOCX (max. 10MB)
+                PDF, DOCX, TXT, LOG, CSV, JSON/NDJSON, images, a ZIP/TAR.GZ bundle or a gzipped file
               </p>
             </>
           )}
           <input
             type="file"
             className="hidden"
-            accept=".pdf,.txt,.md,.docx"
+            accept=".pdf,.docx,.txt,.log,.csv,.json,.ndjson,.jsonl,.png,.jpg,.jpeg,.gif,.bmp,.tiff,.webp,.zip,.tar,.gz,.tgz"
             onChange={handleChange}
             disabled={upload.isPending}
           />
@@ -7,7 +7,40 @@ import { useActivityStore } from "@/store/activityStore";
 import { useAuthStore } from "@/store/authStore";
 import { useAuditLogger } from "@/store/auditStore";
 import { useNotificationStore } from "@/store/notificationStore";
-import type { Evidence } from "@/types/case";
+import type { Evidence, IngestionJob, UploadResponse } from "@/types/case";
+
+const JOB_POLL_INTERVAL_MS = 2000;
+// Consecutive failed status requests before giving up on a job
+const JOB_POLL_MAX_ERRORS = 5;
+
+// Uploads only queue an ingestion job; poll it until the worker finishes or fails it
+async function waitForIngestionJob(jobId: string): Promise<IngestionJob> {
+  let errors = 0;
+  for (;;) {
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    try {
+      const res = await api.get<IngestionJob>(`/evidence/jobs/${jobId}`);
+      errors = 0;
+      if (res.data.status === "done" || res.data.status === "failed") {
+        return res.data;
+      }
+    } catch (error) {
+      errors += 1;
+      if (errors >= JOB_POLL_MAX_ERRORS) {
+        throw error;
+      }
+    }
+  }
+}
+
+function describeFinishedJob(job: IngestionJob): string {
+  const result = job.result || {};
+  if (typeof result.members === "number") {
+    const skipped = typeof result.skipped_count === "number" ? result.skipped_count : 0;
+    return `${result.succeeded}/${result.members} archive members indexed${skipped ? `, ${skipped} skipped` : ""}`;
+  }
+  return `${result.chunks ?? job.processed_chunks} chunks indexed`;
+}
 
 export function useUploadEvidence() {
   const queryClient = useQueryClient();
@@ -40,12 +73,15 @@ export function useUploadEvidence() {
       formData.append("file", file);
       formData.append("case_id", caseId);
 
-      const res = await api.post<Evidence>("/evidence/upload", formData, {
+      // Zip/tar bundles are fanned out server-side into one evidence item per member; a plain .gz
+      // (e.g. auth.log.gz) goes the same way and becomes a single member
+      const isArchive = /\.(zip|tar|tgz|gz)$/i.test(file.name);
+      const res = await api.post<UploadResponse>(isArchive ? "/evidence/upload-archive" : "/evidence/upload", formData, {
         headers: { "Content-Type": "multipart/form-data" },
       });
       return res.data;
     },
-    onSuccess: (_data, variables) => {
+    onSuccess: (data, variables) => {
       invalidateCaseQueries(variables.caseId);
       
       // Track activity
@@ -73,18 +109,55 @@ export function useUploadEvidence() {
       });
       
       // Show processing notification
-      setTimeout(() => {
-        addNotification({
-          type: "processing",
-          title: "Processing Evidence",
-          description: `Extracting entities and analyzing ${variables.file.name}...`,
-          caseId: variables.caseId,
-        });
-      }, 1000);
+      addNotification({
+        type: "processing",
+        title: "Processing Evidence",
+        description: `Extracting entities and analyzing ${variables.file.name}...`,
+        caseId: variables.caseId,
+      });
       
       toast.success("Evidence uploaded", {
         description: "File has been uploaded and is being processed",
       });
+      
+      if (!data?.job_id) {
+        return;
+      }
+      waitForIngestionJob(data.job_id)
+        .then((job) => {
+          invalidateCaseQueries(variables.caseId);
+          if (job.status === "done") {
+            const description = `${variables.file.name}: ${describeFinishedJob(job)}`;
+            addNotification({
+              type: "success",
+              title: "Evidence Processed",
+              description,
+              caseId: variables.caseId,
+              actionUrl: `/dashboard/case/${variables.caseId}`,
+            });
+            toast.success("Evidence processed", { description });
+          } else {
+            const description = `${variables.file.name}: ${job.error || "Processing failed"}`;
+            logAction("UPLOAD_EVIDENCE", variables.file.name, {
+              status: "failed",
+              details: `Processing failed for ${variables.file.name}`,
+              caseId: variables.caseId,
+              errorMessage: job.error || "Processing failed",
+            });
+            addNotification({
+              type: "alert",
+              title: "Evidence Processing Failed",
+              description,
+              caseId: variables.caseId,
+            });
+            toast.error("Evidence processing failed", { description });
+          }
+        })
+        .catch(() => {
+          toast.error("Could not check processing status", {
+            description: `${variables.file.name} may still be processing; refresh the case later`,
+          });
+        });
     },
     onError: (error: unknown, variables) => {
       type ErrorPayload = { msg?: string; detail?: string };
@@ -27,6 +27,27 @@ export interface Evidence {
   created_at: string | null;
 }
 
+export interface IngestionJob {
+  job_id: string;
+  case_id: string;
+  evidence_id?: string | null;
+  filename?: string | null;
+  file_type?: string | null;
+  status: "queued" | "running" | "done" | "failed";
+  processed_chunks: number;
+  total_chunks: number;
+  error?: string | null;
+  result?: Record<string, unknown> | null;
+  members?: IngestionJob[] | null;
+}
+
+export interface UploadResponse {
+  status: string;
+  job_id: string;
+  evidence_id?: string;
+  filename: string;
+}
+
 export interface TimelineEvent {
   id: string;
   timestamp: string;